@@ -172,6 +172,7 @@ install_dependencies() {
     # Image processing libraries
     apt-get install -y \
         libjpeg-dev \
+        libturbojpeg0 \
         libpng-dev \
         libtiff-dev \
         libwebp-dev
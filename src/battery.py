@@ -3,12 +3,14 @@ Pirdfy Battery & System Monitoring Module
 Monitors battery status, CPU, memory, temperature, and disk usage.
 """
 
+import os
 import logging
 import threading
 import time
-from typing import Optional, Dict, Any
+from collections import deque
+from typing import Optional, Dict, Any, Tuple
 from dataclasses import dataclass
-from datetime import datetime
+from datetime import datetime, timezone
 
 try:
     import psutil
@@ -19,8 +21,18 @@ except ImportError:
 
 logger = logging.getLogger(__name__)
 
+THERMAL_ZONE_PATH = "/sys/class/thermal/thermal_zone0/temp"
 
-@dataclass
+# CPU frequency changes slowly; refresh it every N samples
+SLOW_METRICS_EVERY = 10
+
+# Disk usage is re-read via statvfs after this long or this many bytes
+# reported through note_bytes_written(); in between it is estimated
+DISK_REFRESH_SECONDS = 60
+DISK_REFRESH_BYTES = 256 * 1024 * 1024
+
+
+@dataclass(slots=True, frozen=True)
 class SystemStatus:
     """Current system status."""
     timestamp: datetime
@@ -64,15 +76,44 @@ class SystemMonitor:
         self.battery_monitoring = self.config.get("battery_monitoring", True)
         self.collect_stats = self.config.get("collect_stats", True)
         self.stats_interval = self.config.get("stats_interval", 60)
+        self.stats_flush_every = max(1, self.config.get("stats_flush_every", 5))
         
         self._running = False
+        self._stop_event = threading.Event()
         self._monitor_thread = None
         self._last_status: Optional[SystemStatus] = None
         
+        # Samples waiting to be written to the database in one batch
+        self._stats_buffer = deque(maxlen=1024)
+        
+        # (status, dict) pair memoizing get_status_dict() for the last sample
+        self._status_dict_cache: Optional[tuple] = None
+        
         # Callbacks for low battery warnings
         self._low_battery_callbacks = []
         self._low_battery_threshold = 20  # percent
         self._low_battery_warned = False
+        
+        # Static/slow-changing values sampled less often than CPU and memory
+        self._sample_count = 0
+        self._cpu_count = None
+        self._cpu_freq_mhz: Optional[float] = None
+        self._disk = None
+        self._disk_refreshed_at = 0.0
+        self._bytes_since_disk_refresh = 0
+        self._disk_lock = threading.Lock()
+        if PSUTIL_AVAILABLE:
+            self._cpu_count = psutil.cpu_count()
+            # Prime cpu_percent so later non-blocking calls measure since the last one
+            psutil.cpu_percent(interval=None)
+        
+        # Keep the thermal sysfs file open and pread() it on each sample; the lock
+        # keeps stop() from closing (and the OS reusing) the fd mid-read
+        self._thermal_lock = threading.Lock()
+        try:
+            self._thermal_fd: Optional[int] = os.open(THERMAL_ZONE_PATH, os.O_RDONLY)
+        except OSError:
+            self._thermal_fd = None
     
     def start(self):
         """Start the monitoring thread."""
@@ -80,6 +121,7 @@ class SystemMonitor:
             return
         
         self._running = True
+        self._stop_event.clear()
         self._monitor_thread = threading.Thread(target=self._monitor_loop, daemon=True)
         self._monitor_thread.start()
         logger.info("System monitor started")
@@ -87,27 +129,42 @@ class SystemMonitor:
     def stop(self):
         """Stop the monitoring thread."""
         self._running = False
+        self._stop_event.set()
         if self._monitor_thread:
             self._monitor_thread.join(timeout=5)
+        self._flush_stats()
+        with self._thermal_lock:
+            thermal_fd, self._thermal_fd = self._thermal_fd, None
+            if thermal_fd is not None:
+                os.close(thermal_fd)
         logger.info("System monitor stopped")
     
     def _monitor_loop(self):
         """Main monitoring loop."""
+        # Schedule against monotonic deadlines so the cadence doesn't drift,
+        # and wait on the stop event so stop() interrupts immediately
+        deadline = time.monotonic()
         while self._running:
             try:
                 status = self.get_status()
+                # Build the API dict once per tick so requests never have to
+                if status is not None:
+                    self._status_dict_cache = (status, self._build_status_dict(status))
                 self._last_status = status
                 
-                # Store in database
+                # Store in database (batched)
                 if self.database and status:
-                    self.database.add_system_stats(
-                        cpu_percent=status.cpu_percent,
-                        memory_percent=status.memory_percent,
-                        disk_percent=status.disk_percent,
-                        temperature=status.cpu_temperature,
-                        battery_percent=status.battery_percent,
-                        battery_charging=status.battery_charging
-                    )
+                    self._stats_buffer.append((
+                        status.timestamp.astimezone(timezone.utc).strftime("%Y-%m-%d %H:%M:%S"),
+                        status.cpu_percent,
+                        status.memory_percent,
+                        status.disk_percent,
+                        status.cpu_temperature,
+                        status.battery_percent,
+                        status.battery_charging
+                    ))
+                    if len(self._stats_buffer) >= self.stats_flush_every:
+                        self._flush_stats()
                 
                 # Check for low battery
                 if status and status.battery_percent is not None:
@@ -118,11 +175,28 @@ class SystemMonitor:
                     else:
                         self._low_battery_warned = False
                 
-                time.sleep(self.stats_interval)
+                deadline += self.stats_interval
                 
             except Exception as e:
                 logger.error(f"Monitor loop error: {e}")
-                time.sleep(10)
+                deadline = time.monotonic() + 10
+            
+            # Skip missed ticks rather than running them back to back
+            deadline = max(deadline, time.monotonic())
+            if self._stop_event.wait(max(0.0, deadline - time.monotonic())):
+                break
+    
+    def _flush_stats(self):
+        """Write buffered samples to the database."""
+        if not self.database or not self._stats_buffer:
+            return
+        
+        rows = list(self._stats_buffer)
+        self._stats_buffer.clear()
+        try:
+            self.database.add_system_stats_batch(rows)
+        except Exception as e:
+            logger.error(f"Failed to store system stats: {e}")
     
     def get_status(self) -> Optional[SystemStatus]:
         """Get current system status."""
@@ -130,11 +204,16 @@ class SystemMonitor:
             return self._get_mock_status()
         
         try:
-            # CPU info
-            cpu_percent = psutil.cpu_percent(interval=0.1)
-            cpu_count = psutil.cpu_count()
-            cpu_freq = psutil.cpu_freq()
-            cpu_freq_mhz = cpu_freq.current if cpu_freq else None
+            refresh_slow = self._sample_count % SLOW_METRICS_EVERY == 0
+            self._sample_count += 1
+            
+            # CPU info (non-blocking: usage since the previous call)
+            cpu_percent = psutil.cpu_percent(interval=None)
+            cpu_count = self._cpu_count
+            if refresh_slow:
+                cpu_freq = psutil.cpu_freq()
+                self._cpu_freq_mhz = cpu_freq.current if cpu_freq else None
+            cpu_freq_mhz = self._cpu_freq_mhz
             
             # Memory info
             memory = psutil.virtual_memory()
@@ -143,11 +222,10 @@ class SystemMonitor:
             memory_percent = memory.percent
             
             # Disk info
-            disk = psutil.disk_usage(self.data_path)
-            disk_total_gb = disk.total / (1024 * 1024 * 1024)
-            disk_used_gb = disk.used / (1024 * 1024 * 1024)
-            disk_free_gb = disk.free / (1024 * 1024 * 1024)
-            disk_percent = disk.percent
+            disk_total, disk_used, disk_free, disk_percent = self._get_disk_usage()
+            disk_total_gb = disk_total / (1024 * 1024 * 1024)
+            disk_used_gb = disk_used / (1024 * 1024 * 1024)
+            disk_free_gb = disk_free / (1024 * 1024 * 1024)
             
             # CPU temperature (Raspberry Pi specific)
             cpu_temperature = self._get_cpu_temperature()
@@ -186,6 +264,32 @@ class SystemMonitor:
             logger.error(f"Error getting system status: {e}")
             return None
     
+    def note_bytes_written(self, num_bytes: int):
+        """Account for data written since the last disk usage refresh."""
+        with self._disk_lock:
+            self._bytes_since_disk_refresh += num_bytes
+    
+    def _get_disk_usage(self) -> Tuple[int, int, int, float]:
+        """Get (total, used, free, percent) for the data path, refreshing lazily."""
+        now = time.monotonic()
+        with self._disk_lock:
+            pending = self._bytes_since_disk_refresh
+            if (self._disk is None or pending >= DISK_REFRESH_BYTES or
+                    now - self._disk_refreshed_at >= DISK_REFRESH_SECONDS):
+                self._disk = psutil.disk_usage(self.data_path)
+                self._disk_refreshed_at = now
+                self._bytes_since_disk_refresh = 0
+                pending = 0
+            disk = self._disk
+        
+        if pending == 0:
+            return disk.total, disk.used, disk.free, disk.percent
+        
+        used = disk.used + pending
+        free = max(0, disk.free - pending)
+        percent = used / (used + free) * 100 if used + free else 0.0
+        return disk.total, used, free, percent
+    
     def _get_mock_status(self) -> SystemStatus:
         """Return mock status for testing."""
         import random
@@ -211,13 +315,12 @@ class SystemMonitor:
         """Get CPU temperature on Raspberry Pi."""
         try:
             # Try thermal_zone (Linux/Raspberry Pi)
-            thermal_path = "/sys/class/thermal/thermal_zone0/temp"
-            try:
-                with open(thermal_path, "r") as f:
-                    temp = int(f.read().strip()) / 1000.0
-                    return temp
-            except FileNotFoundError:
-                pass
+            with self._thermal_lock:
+                if self._thermal_fd is not None:
+                    try:
+                        return int(os.pread(self._thermal_fd, 16, 0).strip()) / 1000.0
+                    except (OSError, ValueError):
+                        pass
             
             # Try psutil sensors
             if hasattr(psutil, "sensors_temperatures"):
@@ -255,14 +358,31 @@ class SystemMonitor:
                 logger.error(f"Low battery callback error: {e}")
     
     def get_status_dict(self) -> Dict:
-        """Get status as dictionary for API responses."""
-        status = self._last_status or self.get_status()
+        """
+        Get status as dictionary for API responses.
+        The timestamp is left as a datetime for the JSON encoder to format.
+        """
+        status = self._last_status
+        cache = self._status_dict_cache
+        if status is not None and cache is not None and cache[0] is status:
+            return cache[1]
+        
+        if status is None:
+            status = self.get_status()
         
         if status is None:
             return {"error": "Unable to get system status"}
         
+        status_dict = self._build_status_dict(status)
+        if status is self._last_status:
+            self._status_dict_cache = (status, status_dict)
+        return status_dict
+    
+    @staticmethod
+    def _build_status_dict(status: SystemStatus) -> Dict:
+        """Build the API representation of a status sample."""
         return {
-            "timestamp": status.timestamp.isoformat(),
+            "timestamp": status.timestamp,
             "cpu": {
                 "percent": round(status.cpu_percent, 1),
                 "count": status.cpu_count,
@@ -4,14 +4,17 @@ Handles photo capture from Raspberry Pi cameras (supports 1-2 cameras).
 """
 
 import io
+import os
 import time
 import logging
 from datetime import datetime
 from pathlib import Path
 from typing import Optional, Dict, List, Tuple, Any
 from dataclasses import dataclass, field
+from enum import IntEnum
 import threading
-from queue import Queue, Empty
+from queue import Queue, Full
+from concurrent.futures import ThreadPoolExecutor
 
 try:
     from picamera2 import Picamera2
@@ -27,11 +30,60 @@ except Exception as e:
     print(f"Warning: Error importing picamera2: {e}")
     print("Camera features will use mock implementation")
 
+try:
+    from turbojpeg import TurboJPEG, TJPF_RGB
+    TURBOJPEG_AVAILABLE = True
+except ImportError:
+    TURBOJPEG_AVAILABLE = False
+
+try:
+    import cv2
+    CV2_AVAILABLE = True
+except ImportError:
+    CV2_AVAILABLE = False
+
 import numpy as np
 from PIL import Image
 
 logger = logging.getLogger(__name__)
 
+# picamera2 names formats by register order: "BGR888" is packed 3-byte
+# pixels laid out as [R, G, B] in memory, so no alpha channel to strip.
+STILL_PIXEL_FORMAT = "BGR888"
+
+
+class WhiteBalance(IntEnum):
+    """White balance modes (values passed as the AwbMode control)."""
+    AUTO = 0
+    SUNLIGHT = 1
+    CLOUDY = 2
+    SHADE = 3
+    TUNGSTEN = 4
+    FLUORESCENT = 5
+    
+    @classmethod
+    def parse(cls, name: str) -> Optional["WhiteBalance"]:
+        """Resolve a config string (e.g. "cloudy"), or None if unknown."""
+        try:
+            return cls[str(name).upper()]
+        except KeyError:
+            return None
+
+
+def parse_exposure(exposure: str) -> Tuple[bool, Optional[int]]:
+    """
+    Resolve an exposure config value.
+    
+    Returns (auto_exposure, exposure_time_us); "auto" enables AE, otherwise
+    the value is a manual exposure time in milliseconds.
+    """
+    if exposure == "auto":
+        return True, None
+    try:
+        return False, int(float(exposure) * 1000)
+    except ValueError:
+        return False, None
+
 
 @dataclass
 class CameraConfig:
@@ -48,7 +100,7 @@ class CameraConfig:
     jpeg_quality: int = 85
 
 
-@dataclass
+@dataclass(slots=True, frozen=True)
 class CaptureResult:
     """Result from a photo capture."""
     success: bool
@@ -68,6 +120,7 @@ class MockCamera:
         self.camera_id = camera_id
         self.resolution = (1920, 1080)
         self._running = False
+        self._pattern: Optional[np.ndarray] = None
     
     def configure(self, config):
         pass
@@ -78,32 +131,113 @@ class MockCamera:
     def stop(self):
         self._running = False
     
-    def capture_array(self) -> np.ndarray:
-        """Generate a test pattern image."""
+    def _build_pattern(self) -> np.ndarray:
+        """Build the gradient test pattern for the current resolution."""
         width, height = self.resolution
-        # Create a gradient test pattern
-        img = np.zeros((height, width, 3), dtype=np.uint8)
+        x = np.arange(width, dtype=np.float32)
+        y = np.arange(height, dtype=np.float32)[:, None]
         
-        # Create gradient
-        for y in range(height):
-            for x in range(width):
-                img[y, x] = [
-                    int(255 * x / width),
-                    int(255 * y / height),
-                    int(128 + 127 * np.sin((x + y) / 50))
-                ]
+        img = np.empty((height, width, 3), dtype=np.uint8)
+        img[:, :, 0] = x * (255.0 / width)
+        img[:, :, 1] = y * (255.0 / height)
+        
+        # Compute the sine channel in place to keep a single temporary
+        wave = x + y
+        wave *= 1 / 50
+        np.sin(wave, out=wave)
+        wave *= 127
+        wave += 128
+        img[:, :, 2] = wave
         
-        # Add timestamp
-        timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
         # Add camera ID marker
         img[10:50, 10:200] = [255, 255, 255]
         
         return img
     
+    def capture_array(self) -> np.ndarray:
+        """Generate a test pattern image."""
+        # Resolution is fixed after setup, so the pattern is built once and
+        # reused; rebuild only if it was changed.
+        if self._pattern is None or self._pattern.shape[:2] != self.resolution[::-1]:
+            self._pattern = self._build_pattern()
+        
+        return self._pattern.copy()
+    
     def close(self):
         self.stop()
 
 
+class JpegWriter:
+    """
+    Background writer that flushes encoded JPEGs to disk.
+    Keeps SD card latency spikes off the capture thread.
+    """
+    
+    _STOP = object()
+    
+    def __init__(self, maxsize: int = 32, put_timeout: float = 1.0):
+        self._queue: Queue = Queue(maxsize=maxsize)
+        self._put_timeout = put_timeout
+        self._running = False
+        self._thread = None
+    
+    def start(self):
+        """Start the writer thread."""
+        if self._running:
+            return
+        
+        self._running = True
+        self._thread = threading.Thread(target=self._worker_loop, daemon=True)
+        self._thread.start()
+    
+    def stop(self):
+        """Flush pending writes and stop the writer thread."""
+        if not self._running:
+            return
+        
+        self._running = False
+        self._queue.put(self._STOP)
+        if self._thread:
+            self._thread.join(timeout=10)
+    
+    def submit(self, data: bytes, filepath: Path) -> bool:
+        """
+        Queue JPEG bytes for writing (written inline if the writer is not running).
+        
+        Returns False if the backlog stayed full and the frame was not queued;
+        queued writes are never discarded, since their paths are already handed out.
+        """
+        if not self._running:
+            self._write(data, filepath)
+            return True
+        
+        try:
+            self._queue.put((data, filepath), timeout=self._put_timeout)
+            return True
+        except Full:
+            logger.warning(f"Disk writer backlog full, dropped {filepath.name}")
+            return False
+    
+    def _worker_loop(self):
+        """Drain the queue to disk until stopped."""
+        while True:
+            item = self._queue.get()
+            if item is self._STOP:
+                break
+            self._write(*item)
+    
+    @staticmethod
+    def _write(data: bytes, filepath: Path):
+        # Renamed into place, so the web server never serves a half-written photo
+        tmp_path = f"{filepath}.tmp"
+        try:
+            with open(tmp_path, "wb") as f:
+                f.write(data)
+            os.replace(tmp_path, filepath)
+        except OSError as e:
+            logger.error(f"Failed to write {filepath}: {e}")
+
+
 class Camera:
     """Wrapper for a single Raspberry Pi camera."""
     
@@ -115,6 +249,20 @@ class Camera:
         self._camera = None
         self._lock = threading.Lock()
         self._is_recording = False
+        self._filename_prefix = f"cam{config.id}_"
+        
+        # libjpeg-turbo encoder (falls back to OpenCV, then PIL, if unavailable)
+        self._jpeg_encoder = None
+        if TURBOJPEG_AVAILABLE:
+            try:
+                self._jpeg_encoder = TurboJPEG()
+            except Exception as e:
+                logger.warning(f"libturbojpeg not usable, using fallback JPEG encoder: {e}")
+        
+        self._writer = JpegWriter()
+        
+        # Exposure/white balance modes parsed from the config strings
+        self._resolve_modes()
         
     def initialize(self) -> bool:
         """Initialize the camera."""
@@ -125,7 +273,7 @@ class Camera:
                     
                     # Configure for still capture
                     camera_config = self._camera.create_still_configuration(
-                        main={"size": self.config.resolution},
+                        main={"size": self.config.resolution, "format": STILL_PIXEL_FORMAT},
                         lores={"size": (640, 480)},
                         display="lores"
                     )
@@ -140,6 +288,8 @@ class Camera:
                     self._camera.resolution = self.config.resolution
                     self._camera.start()
                 
+                self._writer.start()
+                
                 logger.info(f"Camera {self.config.id} ({self.config.name}) initialized")
                 return True
                 
@@ -168,31 +318,18 @@ class Camera:
                 controls["Saturation"] = self.config.saturation
             
             # Exposure mode
-            if self.config.exposure == "auto":
-                controls["AeEnable"] = True
-            else:
-                controls["AeEnable"] = False
+            controls["AeEnable"] = self._ae_enable
+            if self._exposure_us is not None:
                 # Manual exposure time in microseconds
-                try:
-                    controls["ExposureTime"] = int(float(self.config.exposure) * 1000)
-                except ValueError:
-                    pass
+                controls["ExposureTime"] = self._exposure_us
             
             # White balance
-            wb_modes = {
-                "auto": 0,
-                "sunlight": 1,
-                "cloudy": 2,
-                "shade": 3,
-                "tungsten": 4,
-                "fluorescent": 5
-            }
-            if self.config.white_balance in wb_modes:
-                if self.config.white_balance == "auto":
+            if self._white_balance is not None:
+                if self._white_balance == WhiteBalance.AUTO:
                     controls["AwbEnable"] = True
                 else:
                     controls["AwbEnable"] = False
-                    controls["AwbMode"] = wb_modes[self.config.white_balance]
+                    controls["AwbMode"] = int(self._white_balance)
             
             if controls:
                 self._camera.set_controls(controls)
@@ -200,17 +337,30 @@ class Camera:
         except Exception as e:
             logger.warning(f"Error applying camera settings: {e}")
     
+    def _resolve_modes(self):
+        """Parse the exposure and white balance strings from the config."""
+        self._ae_enable, self._exposure_us = parse_exposure(self.config.exposure)
+        self._white_balance = WhiteBalance.parse(self.config.white_balance)
+    
     def update_settings(self, **kwargs):
         """Update camera settings dynamically."""
         for key, value in kwargs.items():
             if hasattr(self.config, key):
                 setattr(self.config, key, value)
         
+        if "exposure" in kwargs or "white_balance" in kwargs:
+            self._resolve_modes()
+        
         if PICAMERA_AVAILABLE and self._camera:
             self._apply_settings()
     
     def capture(self, save: bool = True) -> CaptureResult:
-        """Capture a single photo."""
+        """
+        Capture a single photo.
+        
+        Args:
+            save: Whether to write the photo to disk as JPEG
+        """
         if self._camera is None:
             return CaptureResult(
                 success=False,
@@ -219,42 +369,56 @@ class Camera:
             )
         
         try:
+            # Only the sensor access needs the lock; encoding runs outside it
+            # so settings updates and other callers aren't held up
             with self._lock:
-                timestamp = datetime.now()
+                now_ns = time.time_ns()
+                
+                filename = None
+                filepath = None
+                if save:
+                    filename = self._capture_filename(now_ns)
+                    filepath = self.photo_dir / filename
                 
                 # Capture image array
                 if PICAMERA_AVAILABLE:
                     image = self._camera.capture_array("main")
-                    # Convert from RGB to BGR for OpenCV compatibility
-                    image = image[:, :, :3]  # Remove alpha if present
                 else:
                     image = self._camera.capture_array()
-                
-                result = CaptureResult(
-                    success=True,
-                    camera_id=self.config.id,
-                    timestamp=timestamp,
-                    image=image,
-                    metadata={
-                        "camera_name": self.config.name,
-                        "resolution": self.config.resolution,
-                        "exposure": self.config.exposure
-                    }
-                )
-                
-                if save:
-                    filename = f"cam{self.config.id}_{timestamp.strftime('%Y%m%d_%H%M%S_%f')}.jpg"
-                    filepath = self.photo_dir / filename
-                    
-                    # Save as JPEG
-                    img_pil = Image.fromarray(image)
-                    img_pil.save(str(filepath), "JPEG", quality=self.config.jpeg_quality)
-                    
-                    result.filename = filename
-                    result.filepath = str(filepath)
-                
-                return result
-                
+            
+            if image.shape[2] == 4:
+                # Sensor ignored the packed format; drop padding byte
+                image = np.ascontiguousarray(image[:, :, :3])
+            
+            metadata = {
+                "camera_name": self.config.name,
+                "resolution": self.config.resolution,
+                "exposure": self.config.exposure
+            }
+            
+            if save:
+                jpeg_bytes = self._encode_jpeg(image)
+                metadata["jpeg_size"] = len(jpeg_bytes)
+                if not self._writer.submit(jpeg_bytes, filepath):
+                    # Never written, so don't hand the path to the database or UI
+                    return CaptureResult(
+                        success=False,
+                        camera_id=self.config.id,
+                        error="Disk writer backlog full"
+                    )
+            
+            return CaptureResult(
+                success=True,
+                camera_id=self.config.id,
+                filepath=str(filepath) if filepath else None,
+                filename=filename,
+                timestamp=datetime.fromtimestamp(now_ns // 1_000_000_000).replace(
+                    microsecond=(now_ns // 1000) % 1_000_000
+                ),
+                image=image,
+                metadata=metadata
+            )
+            
         except Exception as e:
             logger.error(f"Capture error on camera {self.config.id}: {e}")
             return CaptureResult(
@@ -263,31 +427,67 @@ class Camera:
                 error=str(e)
             )
     
+    def _capture_filename(self, now_ns: int) -> str:
+        """Build cam<id>_YYYYmmdd_HHMMSS_ffffff.jpg with integer formatting (no strftime)."""
+        lt = time.localtime(now_ns // 1_000_000_000)
+        us = (now_ns // 1000) % 1_000_000
+        return (
+            f"{self._filename_prefix}{lt.tm_year:04d}{lt.tm_mon:02d}{lt.tm_mday:02d}_"
+            f"{lt.tm_hour:02d}{lt.tm_min:02d}{lt.tm_sec:02d}_{us:06d}.jpg"
+        )
+    
+    def _encode_jpeg(self, image: np.ndarray) -> bytes:
+        """Encode an RGB image as JPEG bytes."""
+        if self._jpeg_encoder is not None:
+            # TurboJPEG reads the ndarray memory directly; padded row strides
+            # (e.g. from picamera2) must be packed first
+            if not image.flags["C_CONTIGUOUS"]:
+                image = np.ascontiguousarray(image)
+            return self._jpeg_encoder.encode(
+                image,
+                quality=self.config.jpeg_quality,
+                pixel_format=TJPF_RGB
+            )
+        
+        if CV2_AVAILABLE:
+            # OpenCV encodes BGR; its imencode is usually backed by libjpeg-turbo
+            ok, encoded = cv2.imencode(
+                ".jpg",
+                cv2.cvtColor(image, cv2.COLOR_RGB2BGR),
+                [cv2.IMWRITE_JPEG_QUALITY, self.config.jpeg_quality]
+            )
+            if ok:
+                return encoded.tobytes()
+        
+        buffer = io.BytesIO()
+        Image.fromarray(image).save(buffer, "JPEG", quality=self.config.jpeg_quality)
+        return buffer.getvalue()
+    
     def start_video_recording(self, output_path: str, duration: float = 20.0) -> bool:
         """Start video recording."""
         if self._camera is None or self._is_recording:
             return False
         
         try:
+            if not PICAMERA_AVAILABLE:
+                logger.warning("Video recording not available in mock mode")
+                return False
+            
+            encoder = H264Encoder(bitrate=10000000)
+            output = FileOutput(output_path)
+            
             with self._lock:
-                if PICAMERA_AVAILABLE:
-                    # Configure for video
-                    video_config = self._camera.create_video_configuration(
-                        main={"size": self.config.resolution}
-                    )
-                    self._camera.configure(video_config)
-                    
-                    encoder = H264Encoder(bitrate=10000000)
-                    output = FileOutput(output_path)
-                    
-                    self._camera.start_recording(encoder, output)
-                    self._is_recording = True
-                    
-                    logger.info(f"Started video recording: {output_path}")
-                    return True
-                else:
-                    logger.warning("Video recording not available in mock mode")
-                    return False
+                # Configure for video
+                video_config = self._camera.create_video_configuration(
+                    main={"size": self.config.resolution}
+                )
+                self._camera.configure(video_config)
+                
+                self._camera.start_recording(encoder, output)
+                self._is_recording = True
+            
+            logger.info(f"Started video recording: {output_path}")
+            return True
                     
         except Exception as e:
             logger.error(f"Failed to start video recording: {e}")
@@ -305,7 +505,7 @@ class Camera:
                     
                     # Reconfigure for still capture
                     camera_config = self._camera.create_still_configuration(
-                        main={"size": self.config.resolution}
+                        main={"size": self.config.resolution, "format": STILL_PIXEL_FORMAT}
                     )
                     self._camera.configure(camera_config)
                     
@@ -325,6 +525,7 @@ class Camera:
             try:
                 if self._is_recording:
                     self.stop_video_recording()
+                self._writer.stop()
                 self._camera.close()
                 self._camera = None
                 logger.info(f"Camera {self.config.id} closed")
@@ -343,8 +544,10 @@ class CameraManager:
         
         self._capture_interval = config.get("camera", {}).get("capture_interval", 1)
         self._running = False
+        self._stop_event = threading.Event()
         self._capture_thread = None
         self._capture_queue = Queue()
+        self._capture_pool: Optional[ThreadPoolExecutor] = None
         
         # Callbacks
         self._on_capture_callbacks = []
@@ -381,6 +584,13 @@ class CameraManager:
             else:
                 success = False
         
+        # Capture multiple cameras concurrently (sensor wait and JPEG encode release the GIL)
+        if len(self.cameras) > 1:
+            self._capture_pool = ThreadPoolExecutor(
+                max_workers=len(self.cameras),
+                thread_name_prefix="capture"
+            )
+        
         logger.info(f"Initialized {len(self.cameras)} camera(s)")
         return success and len(self.cameras) > 0
     
@@ -390,11 +600,10 @@ class CameraManager:
     
     def capture_all(self, save: bool = True) -> List[CaptureResult]:
         """Capture from all cameras."""
-        results = []
-        for camera in self.cameras.values():
-            result = camera.capture(save=save)
-            results.append(result)
-        return results
+        cameras = list(self.cameras.values())
+        if self._capture_pool is None or len(cameras) < 2:
+            return [camera.capture(save=save) for camera in cameras]
+        return list(self._capture_pool.map(lambda camera: camera.capture(save=save), cameras))
     
     def capture_single(self, camera_id: int, save: bool = True) -> CaptureResult:
         """Capture from a specific camera."""
@@ -426,23 +635,33 @@ class CameraManager:
             return
         
         self._running = True
+        self._stop_event.clear()
         self._capture_thread = threading.Thread(target=self._capture_loop, daemon=True)
         self._capture_thread.start()
         logger.info("Started continuous capture")
     
+    @property
+    def capture_native_id(self) -> Optional[int]:
+        """OS thread ID of the capture thread, while it is running."""
+        if self._capture_thread is None:
+            return None
+        return self._capture_thread.native_id
+    
     def stop_continuous_capture(self):
         """Stop continuous capture."""
         self._running = False
+        self._stop_event.set()
         if self._capture_thread:
             self._capture_thread.join(timeout=5)
         logger.info("Stopped continuous capture")
     
     def _capture_loop(self):
         """Main capture loop."""
+        # Schedule against monotonic deadlines so the cadence doesn't drift,
+        # and wait on the stop event so stop() interrupts immediately
+        deadline = time.monotonic()
         while self._running:
             try:
-                start_time = time.time()
-                
                 results = self.capture_all(save=True)
                 
                 # Call callbacks
@@ -452,14 +671,16 @@ class CameraManager:
                     except Exception as e:
                         logger.error(f"Capture callback error: {e}")
                 
-                # Sleep for remaining interval time
-                elapsed = time.time() - start_time
-                sleep_time = max(0, self._capture_interval - elapsed)
-                time.sleep(sleep_time)
+                deadline += self._capture_interval
                 
             except Exception as e:
                 logger.error(f"Capture loop error: {e}")
-                time.sleep(1)  # Prevent tight loop on error
+                deadline = time.monotonic() + 1  # Prevent tight loop on error
+            
+            # Skip missed ticks rather than capturing back to back
+            deadline = max(deadline, time.monotonic())
+            if self._stop_event.wait(max(0.0, deadline - time.monotonic())):
+                break
     
     def update_camera_settings(self, camera_id: int, **settings):
         """Update settings for a specific camera."""
@@ -490,6 +711,9 @@ class CameraManager:
     def close(self):
         """Close all cameras."""
         self.stop_continuous_capture()
+        if self._capture_pool:
+            self._capture_pool.shutdown(wait=True)
+            self._capture_pool = None
         for camera in self.cameras.values():
             camera.close()
         self.cameras.clear()
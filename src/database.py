@@ -5,60 +5,407 @@ SQLite database for storing bird detections, photos, and statistics.
 
 import sqlite3
 import json
-from datetime import datetime, timedelta
+import logging
+import time
 from pathlib import Path
-from typing import Optional, List, Dict, Any
+from typing import Optional, List, Dict, Any, Callable, Iterator
 from contextlib import contextmanager
+from concurrent.futures import Future
+from queue import Queue, Empty
 import threading
 
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
 
-def convert_to_serializable(obj):
-    """Convert numpy/sqlite types to JSON-serializable Python types."""
-    if obj is None:
-        return None
-    if isinstance(obj, bytes):
-        return obj.decode('utf-8', errors='replace')
-    if isinstance(obj, (int, float, str, bool)):
-        return obj
-    if hasattr(obj, 'item'):  # numpy scalar
-        return obj.item()
-    if hasattr(obj, 'isoformat'):  # datetime objects
-        return obj.isoformat()
-    if isinstance(obj, dict):
-        return {str(k): convert_to_serializable(v) for k, v in obj.items()}
-    if isinstance(obj, (list, tuple)):
-        return [convert_to_serializable(v) for v in obj]
-    # For anything else, convert to string
-    return str(obj)
+
+def _dumps(obj) -> bytes:
+    """Serialize a JSON column value to UTF-8 bytes, stored as a BLOB."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(obj, option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS)
+    return json.dumps(obj).encode()
+
+
+def _loads(value):
+    """Parse a JSON column value (BLOB, or TEXT from older databases)."""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(value)
+    return json.loads(value)
+
+
+logger = logging.getLogger(__name__)
+
+# Maximum number of queued writes committed in one transaction
+WRITE_BATCH_SIZE = 64
+
+# DELETE ... RETURNING needs SQLite 3.35+ (Raspberry Pi OS bullseye ships 3.34)
+SQLITE_HAS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+# system_stats keeps only the newest rows (about a week at the default 60 s interval)
+SYSTEM_STATS_MAX_ROWS = 10000
+
+# Number of read-only connections shared by all reader threads
+READ_POOL_SIZE = 8
+
+# How long a reader waits for a pooled connection before opening its own.
+# Never block indefinitely: under an unpatched event loop, the holders may
+# only make progress once this reader yields.
+READ_POOL_TIMEOUT = 0.5
+
+# Columns returned by the read methods, in SELECT order
+PHOTO_COLUMNS = (
+    "id", "filename", "filepath", "camera_id", "captured_at",
+    "has_birds", "bird_count", "metadata", "created_at",
+)
+DETECTION_COLUMNS = (
+    "id", "photo_id", "species", "confidence", "bbox_x", "bbox_y",
+    "bbox_width", "bbox_height", "cropped_image", "detected_at",
+)
+RECENT_DETECTION_COLUMNS = DETECTION_COLUMNS + ("photo_filename", "photo_filepath")
+VIDEO_COLUMNS = (
+    "id", "filename", "filepath", "camera_id", "duration",
+    "trigger_photo_id", "recorded_at", "filesize",
+)
+SYSTEM_STATS_COLUMNS = (
+    "id", "timestamp", "cpu_percent", "memory_percent", "disk_percent",
+    "temperature", "battery_percent", "battery_charging",
+)
+HEATMAP_COLUMNS = ("date", "hour", "total_birds", "photos_with_birds")
+SPECIES_STATS_COLUMNS = ("species", "count", "avg_confidence")
+DAILY_SUMMARY_COLUMNS = ("date", "total_photos", "photos_with_birds", "total_birds")
+
+# SQL statements. Kept as constants so every call passes the identical string
+# and hits the connection's prepared-statement cache.
+STATEMENT_CACHE_SIZE = 256
+
+INSERT_PHOTO_SQL = """
+    INSERT INTO photos (filename, filepath, camera_id, has_birds, bird_count, metadata)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SELECT_PHOTO_SQL = f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos WHERE id = ?"
+# Keyed by (with_birds_only, filter by camera)
+SELECT_RECENT_PHOTOS_SQL = {
+    (birds_only, by_camera): (
+        f"SELECT {', '.join(PHOTO_COLUMNS)} FROM photos WHERE 1=1"
+        + (" AND has_birds = TRUE" if birds_only else "")
+        + (" AND camera_id = ?" if by_camera else "")
+        + " ORDER BY captured_at DESC LIMIT ?"
+    )
+    for birds_only in (False, True)
+    for by_camera in (False, True)
+}
+
+INSERT_DETECTION_SQL = """
+    INSERT INTO detections 
+    (photo_id, species, confidence, bbox_x, bbox_y, bbox_width, bbox_height, cropped_image)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+"""
+SELECT_PHOTO_DETECTIONS_SQL = f"SELECT {', '.join(DETECTION_COLUMNS)} FROM detections WHERE photo_id = ?"
+SELECT_RECENT_DETECTIONS_SQL = """
+    SELECT d.id, d.photo_id, d.species, d.confidence, d.bbox_x, d.bbox_y,
+           d.bbox_width, d.bbox_height, d.cropped_image, d.detected_at,
+           p.filename as photo_filename, p.filepath as photo_filepath
+    FROM detections d
+    JOIN photos p ON d.photo_id = p.id
+    ORDER BY d.detected_at DESC
+    LIMIT ?
+"""
+
+INSERT_VIDEO_SQL = """
+    INSERT INTO videos (filename, filepath, camera_id, duration, trigger_photo_id, filesize)
+    VALUES (?, ?, ?, ?, ?, ?)
+"""
+SELECT_RECENT_VIDEOS_SQL = f"SELECT {', '.join(VIDEO_COLUMNS)} FROM videos ORDER BY recorded_at DESC LIMIT ?"
+
+UPSERT_HOURLY_STATS_SQL = """
+    INSERT INTO hourly_stats (date, hour, total_photos, photos_with_birds, total_birds, species_counts)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ON CONFLICT(date, hour) DO UPDATE SET
+        total_photos = total_photos + excluded.total_photos,
+        photos_with_birds = photos_with_birds + excluded.photos_with_birds,
+        total_birds = total_birds + excluded.total_birds,
+        species_counts = excluded.species_counts
+"""
+SELECT_HEATMAP_SQL = """
+    SELECT date, hour, total_birds, photos_with_birds
+    FROM hourly_stats
+    WHERE date >= ?
+    ORDER BY date, hour
+"""
+SELECT_SPECIES_STATS_SQL = """
+    SELECT species, COUNT(*) as count, AVG(confidence) as avg_confidence
+    FROM detections
+    WHERE detected_at >= ?
+    GROUP BY species
+    ORDER BY count DESC
+"""
+SELECT_DAILY_SUMMARY_SQL = """
+    SELECT 
+        DATE(captured_at) as date,
+        COUNT(*) as total_photos,
+        SUM(has_birds) as photos_with_birds,
+        SUM(bird_count) as total_birds
+    FROM photos
+    WHERE captured_at >= ?
+    GROUP BY DATE(captured_at)
+    ORDER BY date DESC
+"""
+
+INSERT_SYSTEM_STATS_AT_SQL = """
+    INSERT INTO system_stats 
+    (timestamp, cpu_percent, memory_percent, disk_percent, temperature,
+     battery_percent, battery_charging)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+"""
+PRUNE_SYSTEM_STATS_SQL = """
+    DELETE FROM system_stats WHERE id <= (SELECT MAX(id) FROM system_stats) - ?
+"""
+SELECT_LATEST_SYSTEM_STATS_SQL = (
+    f"SELECT {', '.join(SYSTEM_STATS_COLUMNS)} FROM system_stats ORDER BY timestamp DESC LIMIT 1"
+)
+
+
+def _utc_cutoff(days: int) -> str:
+    """
+    Timestamp string for N days ago, comparable with CURRENT_TIMESTAMP columns
+    (which SQLite stores as UTC 'YYYY-MM-DD HH:MM:SS').
+    """
+    return time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(time.time() - days * 86400))
+
+
+def _local_date_cutoff(days: int) -> str:
+    """Local 'YYYY-MM-DD' date N days ago, as used by hourly_stats."""
+    return time.strftime('%Y-%m-%d', time.localtime(time.time() - days * 86400))
+
+
+def _rows_to_dicts(rows, columns: tuple) -> List[Dict]:
+    """Zip plain row tuples with their column names."""
+    return [dict(zip(columns, row)) for row in rows]
+
+
+def _detection_row(photo_id: int, species: str, confidence, bbox_x, bbox_y,
+                   bbox_width, bbox_height, cropped_image: Optional[str]) -> tuple:
+    """
+    Detection insert parameters as native Python types. Coercing here, once
+    per insert, keeps numpy scalars out of the database so reads can return
+    rows as-is.
+    """
+    return (photo_id, species, float(confidence), int(bbox_x), int(bbox_y),
+            int(bbox_width), int(bbox_height), cropped_image)
+
+
+def _photo_to_dict(row) -> Dict:
+    """Build a photo dict, parsing its JSON metadata."""
+    photo = dict(zip(PHOTO_COLUMNS, row))
+    if photo["metadata"] is not None:
+        photo["metadata"] = _loads(photo["metadata"])
+    return photo
+
+
+# Per-connection tuning: WAL lets readers run while a write commits, and
+# synchronous=NORMAL only fsyncs at checkpoints instead of on every commit
+CONNECTION_PRAGMAS = (
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA mmap_size=268435456",
+    "PRAGMA cache_size=-20000",
+)
 
 
 class Database:
-    """Thread-safe SQLite database handler for Pirdfy."""
+    """
+    Thread-safe SQLite database handler for Pirdfy.
+    
+    Rows are returned as plain dicts: SQLite only yields int, float, str and
+    None for these tables, so they are JSON-serializable as-is. JSON columns
+    are stored as UTF-8 BLOBs and returned parsed.
+    
+    Writes are queued to a single writer thread that owns the only read-write
+    connection and commits queued statements in batches; reads borrow a
+    read-only connection from a fixed-size pool.
+    """
+    
+    _STOP = object()
     
     def __init__(self, db_path: str = "data/pirdfy.db"):
         self.db_path = Path(db_path)
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
-        self._local = threading.local()
+        
+        # Connection strings, built once
+        self._db_path_str = str(self.db_path)
+        self._read_only_uri = f"{self.db_path.resolve().as_uri()}?mode=ro"
+        
+        self._write_conn = self._connect()
+        # journal_mode=WAL is stored in the database file
+        self._write_conn.execute("PRAGMA journal_mode=WAL")
+        self._write_lock = threading.Lock()
         self._init_db()
+        
+        # Readers block for a free connection instead of opening one per thread
+        self._read_pool: Queue = Queue(maxsize=READ_POOL_SIZE)
+        for _ in range(READ_POOL_SIZE):
+            self._read_pool.put(self._connect(read_only=True))
+        
+        # Writer thread
+        self._write_queue: Queue = Queue()
+        self._queue_lock = threading.Lock()
+        self._closed = False
+        self._writer_thread = threading.Thread(
+            target=self._writer_loop, daemon=True, name="db-writer"
+        )
+        self._writer_thread.start()
+    
+    def _connect(self, read_only: bool = False) -> sqlite3.Connection:
+        """Open a connection with the standard pragmas applied."""
+        if read_only:
+            conn = sqlite3.connect(
+                self._read_only_uri,
+                uri=True,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+        else:
+            conn = sqlite3.connect(
+                self._db_path_str,
+                check_same_thread=False,
+                cached_statements=STATEMENT_CACHE_SIZE
+            )
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
     
     @contextmanager
     def _get_connection(self):
-        """Get thread-local database connection."""
-        if not hasattr(self._local, 'conn') or self._local.conn is None:
-            self._local.conn = sqlite3.connect(
-                str(self.db_path),
-                check_same_thread=False
-            )
-            self._local.conn.row_factory = sqlite3.Row
+        """Borrow a read-only database connection from the pool."""
         try:
-            yield self._local.conn
+            conn = self._read_pool.get(timeout=READ_POOL_TIMEOUT)
+            pooled = True
+        except Empty:
+            # Pool exhausted (e.g. by slow streaming clients); use a one-off connection
+            conn = self._connect(read_only=True)
+            pooled = False
+        try:
+            yield conn
         except Exception as e:
-            self._local.conn.rollback()
+            conn.rollback()
             raise e
+        finally:
+            if pooled:
+                self._read_pool.put(conn)
+            else:
+                conn.close()
+    
+    def _submit(self, func: Callable[[sqlite3.Connection], Any], wait: bool = True):
+        """
+        Run func(conn) on the write connection.
+        
+        With wait=True, blocks until the batch containing it is committed and
+        returns func's result; otherwise returns immediately and errors are logged.
+        """
+        future = Future()
+        if not wait:
+            future.add_done_callback(self._log_write_error)
+        
+        with self._queue_lock:
+            queued = not self._closed
+            if queued:
+                self._write_queue.put((func, future))
+        
+        if not queued:
+            # Writer has shut down; commit inline
+            with self._write_lock:
+                self._execute_batch([(func, future)])
+        
+        return future.result() if wait else None
+    
+    @staticmethod
+    def _log_write_error(future: Future):
+        """Log the failure of a write nobody is waiting on."""
+        if future.exception() is not None:
+            logger.error(f"Database write failed: {future.exception()}")
+    
+    def _writer_loop(self):
+        """Writer thread: commit queued writes in batches of up to WRITE_BATCH_SIZE."""
+        stopping = False
+        while not stopping:
+            item = self._write_queue.get()
+            if item is self._STOP:
+                break
+            
+            batch = [item]
+            while len(batch) < WRITE_BATCH_SIZE:
+                try:
+                    item = self._write_queue.get_nowait()
+                except Empty:
+                    break
+                if item is self._STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+            
+            with self._write_lock:
+                self._execute_batch(batch)
+    
+    def _execute_batch(self, batch: List[tuple]):
+        """
+        Run queued writes in one transaction and resolve their futures.
+        
+        Each write runs inside its own savepoint, so a write that fails
+        part-way is rolled back without affecting the rest of the batch.
+        """
+        conn = self._write_conn
+        if not conn.in_transaction:
+            # Explicit BEGIN: releasing an outermost savepoint would commit
+            conn.execute("BEGIN")
+        
+        outcomes = []
+        for func, future in batch:
+            conn.execute("SAVEPOINT job")
+            try:
+                result = func(conn)
+            except Exception as e:
+                conn.execute("ROLLBACK TO job")
+                conn.execute("RELEASE job")
+                outcomes.append((future, None, e))
+            else:
+                conn.execute("RELEASE job")
+                outcomes.append((future, result, None))
+        
+        try:
+            self._write_conn.commit()
+        except Exception as e:
+            self._write_conn.rollback()
+            for future, _, _ in outcomes:
+                future.set_exception(e)
+            return
+        
+        for future, result, error in outcomes:
+            if error is None:
+                future.set_result(result)
+            else:
+                future.set_exception(error)
+    
+    def close(self):
+        """Commit pending writes and stop the writer thread."""
+        with self._queue_lock:
+            if self._closed:
+                return
+            self._closed = True
+            self._write_queue.put(self._STOP)
+        self._writer_thread.join(timeout=10)
+        
+        with self._write_lock:
+            try:
+                self._write_conn.execute("PRAGMA optimize")
+            except sqlite3.Error as e:
+                logger.warning(f"PRAGMA optimize failed: {e}")
     
     def _init_db(self):
         """Initialize database schema."""
-        with self._get_connection() as conn:
+        with self._write_lock:
+            conn = self._write_conn
             cursor = conn.cursor()
             
             # Photos table
@@ -71,7 +418,7 @@ class Database:
                     captured_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
                     has_birds BOOLEAN DEFAULT FALSE,
                     bird_count INTEGER DEFAULT 0,
-                    metadata TEXT,
+                    metadata BLOB,
                     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
                 )
             """)
@@ -117,7 +464,7 @@ class Database:
                     total_photos INTEGER DEFAULT 0,
                     photos_with_birds INTEGER DEFAULT 0,
                     total_birds INTEGER DEFAULT 0,
-                    species_counts TEXT,
+                    species_counts BLOB,
                     UNIQUE(date, hour)
                 )
             """)
@@ -143,245 +490,215 @@ class Database:
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_species ON detections(species)")
             cursor.execute("CREATE INDEX IF NOT EXISTS idx_hourly_stats_date ON hourly_stats(date)")
             
+            # Composite indexes so "latest N" queries are index range scans, not sorts
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_photos_birds_time ON photos(has_birds, captured_at DESC)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_detections_time ON detections(detected_at DESC, photo_id)")
+            cursor.execute("CREATE INDEX IF NOT EXISTS idx_system_stats_timestamp ON system_stats(timestamp DESC)")
+            
+            # Gather planner statistics once; close() keeps them fresh with PRAGMA optimize
+            cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'")
+            if cursor.fetchone() is None:
+                cursor.execute("ANALYZE")
+            
             conn.commit()
     
     # Photo methods
     def add_photo(self, filename: str, filepath: str, camera_id: int = 0,
                   has_birds: bool = False, bird_count: int = 0,
-                  metadata: Optional[Dict] = None) -> int:
-        """Add a photo record."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO photos (filename, filepath, camera_id, has_birds, bird_count, metadata)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (filename, filepath, camera_id, has_birds, bird_count,
-                  json.dumps(metadata) if metadata else None))
-            conn.commit()
-            return cursor.lastrowid
+                  metadata: Optional[Dict] = None, wait: bool = True) -> Optional[int]:
+        """
+        Add a photo record.
+        
+        With wait=False, queues the insert and returns None instead of the new id.
+        """
+        params = (filename, filepath, camera_id, has_birds, bird_count,
+                  _dumps(metadata) if metadata else None)
+        
+        return self._submit(lambda conn: conn.execute(INSERT_PHOTO_SQL, params).lastrowid,
+                            wait=wait)
     
-    def update_photo(self, photo_id: int, **kwargs):
-        """Update photo record."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            allowed_fields = ['has_birds', 'bird_count', 'metadata']
-            updates = []
-            values = []
-            for field, value in kwargs.items():
-                if field in allowed_fields:
-                    updates.append(f"{field} = ?")
-                    if field == 'metadata':
-                        value = json.dumps(value) if value else None
-                    values.append(value)
-            if updates:
-                values.append(photo_id)
-                cursor.execute(f"UPDATE photos SET {', '.join(updates)} WHERE id = ?", values)
-                conn.commit()
+    def add_photo_with_detections(self, filename: str, filepath: str, camera_id: int = 0,
+                                  detections: Optional[List[tuple]] = None,
+                                  metadata: Optional[Dict] = None) -> int:
+        """
+        Add a photo and its bird detections in one transaction.
+        
+        Each detection is (species, confidence, bbox_x, bbox_y, bbox_width,
+        bbox_height, cropped_image); has_birds and bird_count are derived from them.
+        """
+        detections = detections or []
+        params = (filename, filepath, camera_id, bool(detections), len(detections),
+                  _dumps(metadata) if metadata else None)
+        
+        def insert(conn):
+            photo_id = conn.execute(INSERT_PHOTO_SQL, params).lastrowid
+            if detections:
+                conn.executemany(INSERT_DETECTION_SQL, [_detection_row(photo_id, *det) for det in detections])
+            return photo_id
+        
+        return self._submit(insert)
     
     def get_photo(self, photo_id: int) -> Optional[Dict]:
         """Get photo by ID."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM photos WHERE id = ?", (photo_id,))
+            cursor.execute(SELECT_PHOTO_SQL, (photo_id,))
             row = cursor.fetchone()
-            return convert_to_serializable(dict(row)) if row else None
+            return _photo_to_dict(row) if row else None
     
     def get_recent_photos(self, limit: int = 100, with_birds_only: bool = False,
                           camera_id: Optional[int] = None) -> List[Dict]:
         """Get recent photos."""
+        return list(self.iter_recent_photos(limit, with_birds_only, camera_id))
+    
+    def iter_recent_photos(self, limit: int = 100, with_birds_only: bool = False,
+                           camera_id: Optional[int] = None) -> Iterator[Dict]:
+        """
+        Yield recent photos one at a time, straight from the cursor.
+        
+        Holds a pooled read connection (and its snapshot) until the iterator is
+        exhausted or closed, so don't do slow work between rows.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            query = "SELECT * FROM photos WHERE 1=1"
-            params = []
-            if with_birds_only:
-                query += " AND has_birds = TRUE"
-            if camera_id is not None:
-                query += " AND camera_id = ?"
-                params.append(camera_id)
-            query += " ORDER BY captured_at DESC LIMIT ?"
-            params.append(limit)
+            query = SELECT_RECENT_PHOTOS_SQL[(bool(with_birds_only), camera_id is not None)]
+            params = (limit,) if camera_id is None else (camera_id, limit)
             cursor.execute(query, params)
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            for row in cursor:
+                yield _photo_to_dict(row)
     
     # Detection methods
-    def add_detection(self, photo_id: int, species: str = "unknown",
-                     confidence: float = 0.0, bbox: tuple = (0, 0, 0, 0),
-                     cropped_image: Optional[str] = None) -> int:
-        """Add a bird detection record."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO detections 
-                (photo_id, species, confidence, bbox_x, bbox_y, bbox_width, bbox_height, cropped_image)
-                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-            """, (photo_id, species, confidence, *bbox, cropped_image))
-            conn.commit()
-            return cursor.lastrowid
-    
     def get_detections_for_photo(self, photo_id: int) -> List[Dict]:
         """Get all detections for a photo."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT * FROM detections WHERE photo_id = ?", (photo_id,))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            cursor.execute(SELECT_PHOTO_DETECTIONS_SQL, (photo_id,))
+            return _rows_to_dicts(cursor.fetchall(), DETECTION_COLUMNS)
     
     def get_recent_detections(self, limit: int = 50) -> List[Dict]:
         """Get recent bird detections with photo info."""
+        return list(self.iter_recent_detections(limit))
+    
+    def iter_recent_detections(self, limit: int = 50) -> Iterator[Dict]:
+        """
+        Yield recent bird detections with photo info, straight from the cursor.
+        
+        Holds a pooled read connection until the iterator is exhausted or closed.
+        """
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT d.*, p.filename as photo_filename, p.filepath as photo_filepath
-                FROM detections d
-                JOIN photos p ON d.photo_id = p.id
-                ORDER BY d.detected_at DESC
-                LIMIT ?
-            """, (limit,))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            cursor.execute(SELECT_RECENT_DETECTIONS_SQL, (limit,))
+            for row in cursor:
+                yield dict(zip(RECENT_DETECTION_COLUMNS, row))
     
     # Video methods
     def add_video(self, filename: str, filepath: str, camera_id: int = 0,
                   duration: float = 0.0, trigger_photo_id: Optional[int] = None,
                   filesize: int = 0) -> int:
         """Add a video record."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO videos (filename, filepath, camera_id, duration, trigger_photo_id, filesize)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (filename, filepath, camera_id, duration, trigger_photo_id, filesize))
-            conn.commit()
-            return cursor.lastrowid
+        params = (filename, filepath, camera_id, duration, trigger_photo_id, filesize)
+        return self._submit(lambda conn: conn.execute(INSERT_VIDEO_SQL, params).lastrowid)
     
     def get_recent_videos(self, limit: int = 20) -> List[Dict]:
         """Get recent videos."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM videos ORDER BY recorded_at DESC LIMIT ?
-            """, (limit,))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            cursor.execute(SELECT_RECENT_VIDEOS_SQL, (limit,))
+            return _rows_to_dicts(cursor.fetchall(), VIDEO_COLUMNS)
     
     # Statistics methods
-    def update_hourly_stats(self, date: str, hour: int, total_photos: int = 0,
-                            photos_with_birds: int = 0, total_birds: int = 0,
-                            species_counts: Optional[Dict] = None):
-        """Update hourly statistics."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO hourly_stats (date, hour, total_photos, photos_with_birds, total_birds, species_counts)
-                VALUES (?, ?, ?, ?, ?, ?)
-                ON CONFLICT(date, hour) DO UPDATE SET
-                    total_photos = total_photos + excluded.total_photos,
-                    photos_with_birds = photos_with_birds + excluded.photos_with_birds,
-                    total_birds = total_birds + excluded.total_birds,
-                    species_counts = excluded.species_counts
-            """, (date, hour, total_photos, photos_with_birds, total_birds,
-                  json.dumps(species_counts) if species_counts else None))
-            conn.commit()
+    def update_hourly_stats_batch(self, rows: List[tuple]):
+        """
+        Add to several hourly statistics buckets in one transaction.
+        
+        Each row is (date, hour, total_photos, photos_with_birds, total_birds,
+        species_counts), with species_counts a dict or None.
+        """
+        if not rows:
+            return
+        params = [
+            (*row[:5], _dumps(row[5]) if row[5] else None)
+            for row in rows
+        ]
+        self._submit(lambda conn: conn.executemany(UPSERT_HOURLY_STATS_SQL, params), wait=False)
     
     def get_hourly_heatmap(self, days: int = 7) -> List[Dict]:
         """Get hourly detection heatmap for the last N days."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d')
-            cursor.execute("""
-                SELECT date, hour, total_birds, photos_with_birds
-                FROM hourly_stats
-                WHERE date >= ?
-                ORDER BY date, hour
-            """, (start_date,))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            start_date = _local_date_cutoff(days)
+            cursor.execute(SELECT_HEATMAP_SQL, (start_date,))
+            return _rows_to_dicts(cursor.fetchall(), HEATMAP_COLUMNS)
     
     def get_species_stats(self, days: int = 30) -> List[Dict]:
         """Get species detection statistics."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            start_date = (datetime.now() - timedelta(days=days)).strftime('%Y-%m-%d %H:%M:%S')
-            cursor.execute("""
-                SELECT species, COUNT(*) as count, AVG(confidence) as avg_confidence
-                FROM detections
-                WHERE detected_at >= ?
-                GROUP BY species
-                ORDER BY count DESC
-            """, (start_date,))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            start_date = _utc_cutoff(days)
+            cursor.execute(SELECT_SPECIES_STATS_SQL, (start_date,))
+            return _rows_to_dicts(cursor.fetchall(), SPECIES_STATS_COLUMNS)
     
     def get_daily_summary(self, days: int = 7) -> List[Dict]:
         """Get daily summary statistics."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT 
-                    DATE(captured_at) as date,
-                    COUNT(*) as total_photos,
-                    SUM(CASE WHEN has_birds THEN 1 ELSE 0 END) as photos_with_birds,
-                    SUM(bird_count) as total_birds
-                FROM photos
-                WHERE captured_at >= datetime('now', ?)
-                GROUP BY DATE(captured_at)
-                ORDER BY date DESC
-            """, (f'-{days} days',))
-            return [convert_to_serializable(dict(row)) for row in cursor.fetchall()]
+            cursor.execute(SELECT_DAILY_SUMMARY_SQL, (_utc_cutoff(days),))
+            return _rows_to_dicts(cursor.fetchall(), DAILY_SUMMARY_COLUMNS)
     
     # System stats methods
-    def add_system_stats(self, cpu_percent: float, memory_percent: float,
-                        disk_percent: float, temperature: Optional[float] = None,
-                        battery_percent: Optional[float] = None,
-                        battery_charging: Optional[bool] = None):
-        """Add system statistics."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute("""
-                INSERT INTO system_stats 
-                (cpu_percent, memory_percent, disk_percent, temperature, battery_percent, battery_charging)
-                VALUES (?, ?, ?, ?, ?, ?)
-            """, (cpu_percent, memory_percent, disk_percent, temperature,
-                  battery_percent, battery_charging))
-            conn.commit()
+    def add_system_stats_batch(self, rows: List[tuple]):
+        """
+        Add several system statistics samples in one transaction.
+        
+        Each row is (timestamp, cpu_percent, memory_percent, disk_percent,
+        temperature, battery_percent, battery_charging), with timestamp as a
+        UTC 'YYYY-MM-DD HH:MM:SS' string.
+        """
+        if not rows:
+            return
+        def insert(conn):
+            conn.executemany(INSERT_SYSTEM_STATS_AT_SQL, rows)
+            conn.execute(PRUNE_SYSTEM_STATS_SQL, (SYSTEM_STATS_MAX_ROWS,))
+        
+        self._submit(insert, wait=False)
     
     def get_latest_system_stats(self) -> Optional[Dict]:
         """Get latest system statistics."""
         with self._get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("""
-                SELECT * FROM system_stats ORDER BY timestamp DESC LIMIT 1
-            """)
+            cursor.execute(SELECT_LATEST_SYSTEM_STATS_SQL)
             row = cursor.fetchone()
-            return convert_to_serializable(dict(row)) if row else None
+            return dict(zip(SYSTEM_STATS_COLUMNS, row)) if row else None
     
     # Cleanup methods
     def cleanup_old_data(self, photo_days: int = 30, video_days: int = 7):
         """Remove old photos and videos."""
-        with self._get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Get old photo files for deletion
-            cursor.execute("""
-                SELECT filepath FROM photos 
-                WHERE captured_at < datetime('now', ?)
-            """, (f'-{photo_days} days',))
-            photo_files = [row['filepath'] for row in cursor.fetchall()]
-            
-            # Get old video files for deletion
-            cursor.execute("""
-                SELECT filepath FROM videos 
-                WHERE recorded_at < datetime('now', ?)
-            """, (f'-{video_days} days',))
-            video_files = [row['filepath'] for row in cursor.fetchall()]
-            
-            # Delete old records
-            cursor.execute("""
-                DELETE FROM photos WHERE captured_at < datetime('now', ?)
-            """, (f'-{photo_days} days',))
-            
-            cursor.execute("""
-                DELETE FROM videos WHERE recorded_at < datetime('now', ?)
-            """, (f'-{video_days} days',))
-            
-            conn.commit()
+        def delete_old(cursor, table: str, time_column: str, days: int) -> List[str]:
+            """Delete rows older than days and return their file paths."""
+            cutoff = _utc_cutoff(days)
+            if SQLITE_HAS_RETURNING:
+                cursor.execute(f"""
+                    DELETE FROM {table} WHERE {time_column} < ?
+                    RETURNING filepath
+                """, (cutoff,))
+                return [row[0] for row in cursor.fetchall()]
             
+            cursor.execute(f"""
+                SELECT filepath FROM {table} WHERE {time_column} < ?
+            """, (cutoff,))
+            files = [row[0] for row in cursor.fetchall()]
+            cursor.execute(f"""
+                DELETE FROM {table} WHERE {time_column} < ?
+            """, (cutoff,))
+            return files
+        
+        def cleanup(conn):
+            cursor = conn.cursor()
+            photo_files = delete_old(cursor, "photos", "captured_at", photo_days)
+            video_files = delete_old(cursor, "videos", "recorded_at", video_days)
             return photo_files, video_files
+        
+        return self._submit(cleanup)
 
 
 # Singleton instance
@@ -4,14 +4,17 @@ Uses YOLOv8 for bird detection and segmentation.
 """
 
 import logging
+import os
 from pathlib import Path
 from typing import Optional, List, Dict, Tuple, Any
 from dataclasses import dataclass, field
 import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, Future, wait
+from functools import lru_cache
 from datetime import datetime
 
 import numpy as np
-from PIL import Image
 
 try:
     from ultralytics import YOLO
@@ -25,6 +28,71 @@ import cv2
 logger = logging.getLogger(__name__)
 
 
+# Detection label style
+LABEL_FONT = cv2.FONT_HERSHEY_SIMPLEX
+LABEL_FONT_SCALE = 0.6
+LABEL_THICKNESS = 2
+
+# JPEG quality for saved crops and annotated frames
+CROP_JPEG_QUALITY = 90
+ANNOTATED_JPEG_QUALITY = 85
+
+# Background saves allowed in flight; each holds a frame or crop in memory
+MAX_PENDING_SAVES = 16
+
+# Gallery thumbnails: longest side and WebP quality
+THUMB_MAX_SIDE = 320
+THUMB_WEBP_QUALITY = 75
+
+
+@lru_cache(maxsize=512)
+def _label_size(label: str) -> Tuple[int, int]:
+    """Rendered (width, height) of a label; labels repeat, so sizes are cached."""
+    (label_w, label_h), _ = cv2.getTextSize(label, LABEL_FONT, LABEL_FONT_SCALE, LABEL_THICKNESS)
+    return label_w, label_h
+
+
+@lru_cache(maxsize=None)
+def _jpeg_params(quality: int) -> Tuple[int, int]:
+    """cv2.imencode parameters for a quality level, built once and reused."""
+    return (cv2.IMWRITE_JPEG_QUALITY, int(quality))
+
+
+def _save_encoded(image: np.ndarray, filepath: Path, ext: str, params: Tuple[int, int]):
+    """Encode a BGR image with OpenCV and write it to disk."""
+    try:
+        # OpenCV encodes BGR natively, so no colour conversion or PIL copy
+        ok, encoded = cv2.imencode(ext, image, params)
+        if not ok:
+            raise ValueError(f"{ext} encoding failed")
+        # Renamed into place, so the web server never serves a half-written file
+        tmp_path = f"{filepath}.tmp"
+        Path(tmp_path).write_bytes(encoded.tobytes())
+        os.replace(tmp_path, filepath)
+    except Exception as e:
+        logger.error(f"Failed to save {filepath}: {e}")
+
+
+def _save_jpeg(image: np.ndarray, filepath: Path, quality: int):
+    """Encode a BGR image as JPEG and write it to disk."""
+    _save_encoded(image, filepath, ".jpg", _jpeg_params(quality))
+
+
+def _save_webp(image: np.ndarray, filepath: Path, quality: int):
+    """Encode a BGR image as WebP and write it to disk."""
+    _save_encoded(image, filepath, ".webp", (cv2.IMWRITE_WEBP_QUALITY, int(quality)))
+
+
+def _thumbnail_image(image: np.ndarray) -> np.ndarray:
+    """A new, gallery-sized copy of a frame (unaffected by later drawing on the frame)."""
+    height, width = image.shape[:2]
+    scale = THUMB_MAX_SIDE / max(height, width)
+    if scale >= 1:
+        return image.copy()
+    size = (max(1, round(width * scale)), max(1, round(height * scale)))
+    return cv2.resize(image, size, interpolation=cv2.INTER_AREA)
+
+
 @dataclass
 class Detection:
     """A single bird detection."""
@@ -34,7 +102,7 @@ class Detection:
     bbox: Tuple[int, int, int, int]  # x, y, width, height
     center: Tuple[int, int]
     area: int
-    cropped_image: Optional[np.ndarray] = None
+    cropped_image: Optional[np.ndarray] = None  # view into the source frame
     cropped_path: Optional[str] = None
 
 
@@ -53,33 +121,37 @@ class MockDetector:
     
     def __init__(self, confidence_threshold: float = 0.5):
         self.confidence_threshold = confidence_threshold
+        self._rng = np.random.default_rng()
     
     def detect(self, image: np.ndarray) -> DetectionResult:
         """Generate mock detections (occasionally returns birds)."""
-        import random
-        
         detections = []
         
         # Randomly generate 0-2 bird detections
-        if random.random() > 0.7:  # 30% chance of detection
-            num_birds = random.randint(1, 2)
+        if self._rng.random() > 0.7:  # 30% chance of detection
+            num_birds = int(self._rng.integers(1, 2, endpoint=True))
             h, w = image.shape[:2]
             
-            for _ in range(num_birds):
-                # Random bounding box
-                box_w = random.randint(50, min(200, w // 3))
-                box_h = random.randint(50, min(200, h // 3))
-                x = random.randint(0, w - box_w)
-                y = random.randint(0, h - box_h)
-                
-                detections.append(Detection(
+            # Random bounding boxes, drawn for all birds at once
+            box_w = self._rng.integers(50, min(200, w // 3), size=num_birds, endpoint=True)
+            box_h = self._rng.integers(50, min(200, h // 3), size=num_birds, endpoint=True)
+            x = self._rng.integers(0, w - box_w, endpoint=True)
+            y = self._rng.integers(0, h - box_h, endpoint=True)
+            confidence = self._rng.uniform(0.5, 0.95, size=num_birds)
+            
+            detections = [
+                Detection(
                     class_id=14,  # Bird class in COCO
                     class_name="bird",
-                    confidence=random.uniform(0.5, 0.95),
-                    bbox=(x, y, box_w, box_h),
-                    center=(x + box_w // 2, y + box_h // 2),
-                    area=box_w * box_h
-                ))
+                    confidence=conf,
+                    bbox=(bx, by, bw, bh),
+                    center=(bx + bw // 2, by + bh // 2),
+                    area=bw * bh
+                )
+                for bx, by, bw, bh, conf in zip(
+                    x.tolist(), y.tolist(), box_w.tolist(), box_h.tolist(), confidence.tolist()
+                )
+            ]
         
         return DetectionResult(
             success=True,
@@ -95,6 +167,13 @@ class BirdDetector:
     BIRD_CLASS_ID = 14
     BIRD_CLASS_NAME = "bird"
     
+    # Where ultralytics writes exported models, relative to the .pt file
+    EXPORT_SUFFIXES = {
+        "onnx": ".onnx",
+        "openvino": "_openvino_model",
+        "engine": ".engine",
+    }
+    
     def __init__(self, config: Dict[str, Any], birds_dir: str = "data/birds"):
         self.config = config.get("detection", {})
         self.birds_dir = Path(birds_dir)
@@ -105,9 +184,22 @@ class BirdDetector:
         self.enable_segmentation = self.config.get("enable_segmentation", True)
         self.target_classes = self.config.get("target_classes", ["bird"])
         
+        # Inference backend: "pytorch", or an export format run via ultralytics
+        self.export_format = str(self.config.get("export_format", "onnx")).lower()
+        self.int8 = self.config.get("int8", False)
+        self.half = self.config.get("half", False)
+        # A single size means a square input; [height, width] can match the camera aspect
+        imgsz = self.config.get("imgsz", 640)
+        self.imgsz = tuple(imgsz) if isinstance(imgsz, (list, tuple)) else (imgsz, imgsz)
+        self.fixed_shape = self.config.get("fixed_shape", False)
+        
         self._model = None
         self._lock = threading.Lock()
         
+        # JPEG encoding and disk writes run here, off the detection thread
+        self._io_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="detector-io")
+        self._pending_saves = threading.BoundedSemaphore(MAX_PENDING_SAVES)
+        
         # Color for drawing (bright green)
         self.box_color = (0, 255, 0)
         self.text_color = (255, 255, 255)
@@ -117,15 +209,13 @@ class BirdDetector:
         try:
             with self._lock:
                 if YOLO_AVAILABLE:
-                    # Download model if needed
-                    model_path = f"{self.model_name}.pt"
-                    self._model = YOLO(model_path)
+                    self._model = self._load_model()
                     
                     # Warm up model
-                    dummy = np.zeros((640, 640, 3), dtype=np.uint8)
-                    self._model.predict(dummy, verbose=False)
+                    dummy = np.zeros((*self.imgsz, 3), dtype=np.uint8)
+                    self._model.predict(dummy, imgsz=list(self.imgsz), verbose=False)
                     
-                    logger.info(f"Bird detector initialized with {self.model_name}")
+                    logger.info(f"Bird detector initialized with {self.model_name} ({self.export_format})")
                 else:
                     self._model = MockDetector(self.confidence_threshold)
                     logger.warning("Using mock detector (YOLO not available)")
@@ -136,119 +226,270 @@ class BirdDetector:
             logger.error(f"Failed to initialize detector: {e}")
             return False
     
-    def detect(self, image: np.ndarray, save_crops: bool = True) -> DetectionResult:
+    def _load_model(self):
+        """
+        Load the YOLO model, exporting it to the configured format once.
+        Falls back to the PyTorch checkpoint if export isn't possible.
+        """
+        # Download model if needed
+        model_path = f"{self.model_name}.pt"
+        suffix = self.EXPORT_SUFFIXES.get(self.export_format)
+        if suffix is None:
+            if self.export_format != "pytorch":
+                logger.warning(f"Unknown export format '{self.export_format}', using PyTorch")
+                self.export_format = "pytorch"
+            return YOLO(model_path)
+        
+        # Exports are cached per input shape and precision, so changing either
+        # builds a new model instead of silently reusing a stale one
+        height, width = self.imgsz
+        precision = "int8" if self.int8 else "fp16" if self.half else "fp32"
+        shape = "static" if self._static_shape else "dynamic"
+        exported_path = Path(f"{self.model_name}_{height}x{width}_{precision}_{shape}{suffix}")
+        
+        try:
+            if not exported_path.exists():
+                logger.info(f"Exporting {model_path} to {self.export_format} (one-time)...")
+                export_args = {}
+                if self.export_format == "engine":
+                    # TensorRT engines are built for the local CUDA device
+                    export_args["device"] = 0
+                else:
+                    # Dynamic batch axis so frames from several cameras share one run,
+                    # unless a fixed (1, 3, H, W) graph was requested
+                    export_args["dynamic"] = not self.fixed_shape
+                exported = YOLO(model_path).export(
+                    format=self.export_format,
+                    imgsz=list(self.imgsz),
+                    int8=self.int8,
+                    half=self.half,
+                    **export_args
+                )
+                Path(exported).rename(exported_path)
+            return YOLO(str(exported_path), task="detect")
+        except Exception as e:
+            logger.warning(f"Could not use {self.export_format} model, falling back to PyTorch: {e}")
+            self.export_format = "pytorch"
+            return YOLO(model_path)
+    
+    @property
+    def _static_shape(self) -> bool:
+        """Whether the model only accepts a fixed (1, 3, H, W) input."""
+        return self.export_format == "engine" or (
+            self.fixed_shape and self.export_format != "pytorch"
+        )
+    
+    def detect(self, image: np.ndarray, save_crops: bool = True,
+               timestamp: Optional[datetime] = None,
+               annotate_inplace: bool = False) -> DetectionResult:
         """
         Run bird detection on an image.
         
         Args:
             image: Input image as numpy array (BGR or RGB)
             save_crops: Whether to save cropped bird images
+            timestamp: Time used in crop filenames (defaults to now)
+            annotate_inplace: Draw boxes on the input image instead of a copy
             
         Returns:
             DetectionResult with detections and annotated image
         """
+        return self.detect_batch(
+            [image], save_crops=save_crops, timestamp=timestamp,
+            annotate_inplace=annotate_inplace
+        )[0]
+    
+    def detect_batch(self, images: List[np.ndarray], save_crops: bool = True,
+                     timestamp: Optional[datetime] = None,
+                     annotate_inplace: bool = False) -> List[DetectionResult]:
+        """
+        Run bird detection on several images with a single model invocation.
+        
+        Args:
+            images: Input images as numpy arrays (BGR or RGB)
+            save_crops: Whether to save cropped bird images
+            timestamp: Time used in crop filenames (defaults to now)
+            annotate_inplace: Draw boxes on the input images instead of copies;
+                only for callers that don't need the unannotated frames afterwards.
+                Crops are saved before the boxes are drawn, but their arrays
+                (views into the frame) show the boxes afterwards
+            
+        Returns:
+            One DetectionResult per input image, in the same order
+        """
         if self._model is None:
-            return DetectionResult(
-                success=False,
-                error="Detector not initialized"
-            )
+            return [
+                DetectionResult(success=False, error="Detector not initialized")
+                for _ in images
+            ]
+        
+        if not images:
+            return []
+        
+        if timestamp is None:
+            timestamp = datetime.now()
         
         try:
-            import time
             start_time = time.time()
             
+            # The lock only covers model inference (ultralytics predictors are not
+            # safe to share between threads); crops and annotation run outside it
             with self._lock:
                 if not YOLO_AVAILABLE:
                     # Use mock detector
-                    result = self._model.detect(image)
+                    mock_results = [self._model.detect(image) for image in images]
+                else:
+                    # Run YOLO detection
+                    predictions = self._predict(images)
+            
+            if not YOLO_AVAILABLE:
+                for image, result in zip(images, mock_results):
                     if save_crops and result.detections:
-                        self._save_crops(image, result.detections)
-                    return result
-                
-                # Run YOLO detection
-                results = self._model.predict(
-                    image,
-                    conf=self.confidence_threshold,
-                    classes=[self.BIRD_CLASS_ID],  # Only detect birds
-                    verbose=False
-                )
-                
-                detections = []
-                
-                for result in results:
-                    boxes = result.boxes
-                    
-                    if boxes is not None and len(boxes) > 0:
-                        for box in boxes:
-                            # Get bounding box
-                            x1, y1, x2, y2 = box.xyxy[0].cpu().numpy().astype(int)
-                            conf = float(box.conf[0].cpu().numpy())
-                            cls_id = int(box.cls[0].cpu().numpy())
-                            
-                            width = x2 - x1
-                            height = y2 - y1
-                            
-                            detection = Detection(
-                                class_id=cls_id,
-                                class_name=self.BIRD_CLASS_NAME,
-                                confidence=conf,
-                                bbox=(x1, y1, width, height),
-                                center=(x1 + width // 2, y1 + height // 2),
-                                area=width * height
-                            )
-                            
-                            # Crop bird image
-                            if self.enable_segmentation:
-                                # Add padding
-                                pad = 20
-                                crop_y1 = max(0, y1 - pad)
-                                crop_y2 = min(image.shape[0], y2 + pad)
-                                crop_x1 = max(0, x1 - pad)
-                                crop_x2 = min(image.shape[1], x2 + pad)
-                                
-                                detection.cropped_image = image[crop_y1:crop_y2, crop_x1:crop_x2].copy()
-                            
-                            detections.append(detection)
+                        self._save_crops(image, result.detections, timestamp)
+                return mock_results
+            
+            results = []
+            for image, prediction in zip(images, predictions):
+                detections = self._extract_detections(image, prediction)
                 
                 # Save cropped images
+                crop_saves = []
                 if save_crops and detections:
-                    self._save_crops(image, detections)
-                
-                # Create annotated image
-                annotated = self._annotate_image(image.copy(), detections)
+                    crop_saves = self._save_crops(image, detections, timestamp)
                 
-                processing_time = time.time() - start_time
+                # Create annotated image (only frames with birds are annotated)
+                annotated = None
+                if detections:
+                    if annotate_inplace:
+                        # Crops are views into the frame; let their encodes
+                        # read it before drawing on it
+                        wait(crop_saves)
+                        annotated = self._annotate_image(image, detections)
+                    else:
+                        annotated = self._annotate_image(image.copy(), detections)
                 
-                return DetectionResult(
+                results.append(DetectionResult(
                     success=True,
                     detections=detections,
-                    annotated_image=annotated,
-                    processing_time=processing_time
-                )
-                
+                    annotated_image=annotated
+                ))
+            
+            processing_time = time.time() - start_time
+            for result in results:
+                result.processing_time = processing_time
+            
+            return results
+            
         except Exception as e:
             logger.error(f"Detection error: {e}")
-            return DetectionResult(
-                success=False,
-                error=str(e)
-            )
+            return [DetectionResult(success=False, error=str(e)) for _ in images]
     
-    def _save_crops(self, image: np.ndarray, detections: List[Detection]):
-        """Save cropped bird images."""
-        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    def _predict(self, images: List[np.ndarray]) -> List:
+        """Run the model on a batch of images, returning one result per image."""
+        predict_args = {
+            "imgsz": list(self.imgsz),
+            "conf": self.confidence_threshold,
+            "classes": [self.BIRD_CLASS_ID],  # Only detect birds
+            "verbose": False
+        }
+        
+        if self._static_shape and len(images) > 1:
+            # Fixed-shape exports (and TensorRT engines) take a batch size of 1
+            return [
+                result
+                for image in images
+                for result in self._model.predict(image, **predict_args)
+            ]
         
+        return self._model.predict(list(images), **predict_args)
+    
+    def _extract_detections(self, image: np.ndarray, result) -> List[Detection]:
+        """Convert a YOLO result for one image into Detection objects."""
+        detections = []
+        boxes = result.boxes
+        
+        if boxes is not None and len(boxes) > 0:
+            # One device->host transfer per tensor instead of per box
+            xyxy = boxes.xyxy.cpu().numpy().astype(np.int32)
+            confidences = boxes.conf.cpu().numpy().tolist()
+            class_ids = boxes.cls.cpu().numpy().astype(np.int32).tolist()
+            
+            # Box geometry for all detections at once
+            sizes = xyxy[:, 2:] - xyxy[:, :2]
+            centers = xyxy[:, :2] + sizes // 2
+            areas = sizes[:, 0] * sizes[:, 1]
+            
+            # Padded crop bounds, clipped to the frame
+            pad = 20
+            height, width = image.shape[:2]
+            crops = np.empty_like(xyxy)
+            crops[:, :2] = np.maximum(xyxy[:, :2] - pad, 0)
+            crops[:, 2] = np.minimum(xyxy[:, 2] + pad, width)
+            crops[:, 3] = np.minimum(xyxy[:, 3] + pad, height)
+            
+            # .tolist() yields native ints, which sqlite and JSON accept directly
+            for (x1, y1), (w, h), center, area, conf, cls_id, crop in zip(
+                    xyxy[:, :2].tolist(), sizes.tolist(), centers.tolist(),
+                    areas.tolist(), confidences, class_ids, crops.tolist()):
+                detection = Detection(
+                    class_id=cls_id,
+                    class_name=self.BIRD_CLASS_NAME,
+                    confidence=conf,
+                    bbox=(x1, y1, w, h),
+                    center=tuple(center),
+                    area=area
+                )
+                
+                # Crop bird image
+                if self.enable_segmentation:
+                    crop_x1, crop_y1, crop_x2, crop_y2 = crop
+                    # View into the frame (no copy); detect_batch detaches it before in-place drawing
+                    detection.cropped_image = image[crop_y1:crop_y2, crop_x1:crop_x2]
+                
+                detections.append(detection)
+        
+        return detections
+    
+    def _save_crops(self, image: np.ndarray, detections: List[Detection],
+                    timestamp: datetime) -> List[Future]:
+        """Save cropped bird images; returns the futures of saves still running."""
+        timestamp = timestamp.strftime("%Y%m%d_%H%M%S")
+        
+        pending = []
         for i, det in enumerate(detections):
             if det.cropped_image is not None:
                 filename = f"bird_{timestamp}_{i}_{int(det.confidence * 100)}.jpg"
                 filepath = self.birds_dir / filename
                 
-                # Convert to PIL and save
-                crop_rgb = cv2.cvtColor(det.cropped_image, cv2.COLOR_BGR2RGB) \
-                    if det.cropped_image.shape[-1] == 3 else det.cropped_image
-                img_pil = Image.fromarray(crop_rgb)
-                img_pil.save(str(filepath), "JPEG", quality=90)
-                
+                # Path is known now; the file is written in the background
+                future = self.save_image_async(det.cropped_image, filepath, quality=CROP_JPEG_QUALITY)
+                if future is not None:
+                    pending.append(future)
                 det.cropped_path = str(filepath)
+        return pending
+    
+    def save_image_async(self, image: np.ndarray, filepath: Path, quality: int = CROP_JPEG_QUALITY,
+                         save=_save_jpeg) -> Optional[Future]:
+        """
+        Queue a BGR image to be saved (as JPEG, unless another save function
+        is given) without blocking the caller.
+        Saves inline once MAX_PENDING_SAVES are already queued.
+        
+        Returns the save's future, or None if it was saved inline.
+        """
+        if not self._pending_saves.acquire(blocking=False):
+            # Disk is behind; save inline rather than let queued frames pile up in memory
+            save(image, filepath, quality)
+            return None
+        try:
+            future = self._io_pool.submit(save, image, filepath, quality)
+        except RuntimeError:
+            # Pool already shut down
+            self._pending_saves.release()
+            save(image, filepath, quality)
+            return None
+        future.add_done_callback(lambda _: self._pending_saves.release())
+        return future
     
     def _annotate_image(self, image: np.ndarray, detections: List[Detection]) -> np.ndarray:
         """Draw bounding boxes and labels on image."""
@@ -260,11 +501,7 @@ class BirdDetector:
             
             # Draw label background
             label = f"{det.class_name}: {det.confidence:.2f}"
-            font = cv2.FONT_HERSHEY_SIMPLEX
-            font_scale = 0.6
-            thickness = 2
-            
-            (label_w, label_h), baseline = cv2.getTextSize(label, font, font_scale, thickness)
+            label_w, label_h = _label_size(label)
             
             cv2.rectangle(
                 image,
@@ -279,10 +516,10 @@ class BirdDetector:
                 image,
                 label,
                 (x + 5, y - 5),
-                font,
-                font_scale,
+                LABEL_FONT,
+                LABEL_FONT_SCALE,
                 self.text_color,
-                thickness
+                LABEL_THICKNESS
             )
         
         return image
@@ -296,6 +533,7 @@ class BirdDetector:
         """Get information about the current model."""
         return {
             "model_name": self.model_name,
+            "backend": self.export_format,
             "confidence_threshold": self.confidence_threshold,
             "enable_segmentation": self.enable_segmentation,
             "yolo_available": YOLO_AVAILABLE,
@@ -305,6 +543,7 @@ class BirdDetector:
     def close(self):
         """Cleanup detector resources."""
         self._model = None
+        self._io_pool.shutdown(wait=True)
         logger.info("Bird detector closed")
 
 
@@ -314,16 +553,26 @@ class DetectionPipeline:
     Processes images and stores results in database.
     """
     
-    def __init__(self, detector: BirdDetector, database, annotated_dir: str = "data/annotated"):
+    def __init__(self, detector: BirdDetector, database, annotated_dir: str = "data/annotated",
+                 thumbs_dir: str = "data/thumbs", stats_flush_seconds: float = 5.0):
         self.detector = detector
         self.database = database
         self.annotated_dir = Path(annotated_dir)
         self.annotated_dir.mkdir(parents=True, exist_ok=True)
+        self.thumbs_dir = Path(thumbs_dir)
+        self.thumbs_dir.mkdir(parents=True, exist_ok=True)
         
         # Statistics
         self.total_processed = 0
         self.total_birds_detected = 0
         
+        # Hourly stats are accumulated here and written in one upsert per
+        # hour bucket instead of one UPDATE per frame
+        self.stats_flush_seconds = stats_flush_seconds
+        self._hour_buffer: Dict[Tuple[str, int], List[int]] = {}
+        self._hour_lock = threading.Lock()
+        self._last_stats_flush = time.monotonic()
+        
         # Callbacks for bird detection events
         self._bird_detected_callbacks = []
     
@@ -341,37 +590,84 @@ class DetectionPipeline:
         Returns:
             DetectionResult or None if capture failed
         """
-        if not capture_result.success or capture_result.image is None:
-            return None
+        return self.process_batch([capture_result])[0]
+    
+    def process_batch(self, capture_results: List) -> List[Optional[DetectionResult]]:
+        """
+        Process multiple capture results, running detection on all frames at once.
         
-        try:
-            # Run detection
-            detection_result = self.detector.detect(capture_result.image, save_crops=True)
+        Args:
+            capture_results: CaptureResults, e.g. one per camera
             
+        Returns:
+            One DetectionResult per capture (None where the capture failed)
+        """
+        valid = [
+            capture for capture in capture_results
+            if capture.success and capture.image is not None
+        ]
+        
+        # One clock read per batch, shared by crop filenames and hourly stats
+        now = datetime.now()
+        
+        # Gallery thumbnails, taken before detection draws on the frames in place
+        thumbnails = {id(capture): _thumbnail_image(capture.image) for capture in valid}
+        
+        detection_results = {}
+        if valid:
+            try:
+                batch = self.detector.detect_batch(
+                    [capture.image for capture in valid],
+                    save_crops=True,
+                    timestamp=now,
+                    # Captures are already encoded to disk and not reused afterwards
+                    annotate_inplace=True
+                )
+                detection_results = {id(capture): result for capture, result in zip(valid, batch)}
+            except Exception as e:
+                logger.error(f"Pipeline processing error: {e}")
+                failed = DetectionResult(success=False, error=str(e))
+                detection_results = {id(capture): failed for capture in valid}
+        
+        results = []
+        for capture in capture_results:
+            detection_result = detection_results.get(id(capture))
+            if detection_result is not None:
+                detection_result = self._record_detection(
+                    capture, detection_result, now, thumbnails.get(id(capture))
+                )
+            results.append(detection_result)
+        
+        self._maybe_flush_stats(now)
+        return results
+    
+    def _record_detection(self, capture_result, detection_result: DetectionResult,
+                          now: datetime, thumbnail: Optional[np.ndarray] = None) -> DetectionResult:
+        """Store a detection result and notify listeners."""
+        try:
             if not detection_result.success:
                 return detection_result
             
             has_birds = len(detection_result.detections) > 0
             bird_count = len(detection_result.detections)
             
-            # Save to database
-            photo_id = self.database.add_photo(
+            # Save the photo and its detections in one transaction
+            photo_id = self.database.add_photo_with_detections(
                 filename=capture_result.filename,
                 filepath=capture_result.filepath,
                 camera_id=capture_result.camera_id,
-                has_birds=has_birds,
-                bird_count=bird_count,
+                detections=[
+                    ("unknown", det.confidence, *det.bbox, det.cropped_path)  # Future: species identification
+                    for det in detection_result.detections
+                ],
                 metadata=capture_result.metadata
             )
             
-            # Save individual detections
-            for det in detection_result.detections:
-                self.database.add_detection(
-                    photo_id=photo_id,
-                    species="unknown",  # Future: species identification
-                    confidence=det.confidence,
-                    bbox=det.bbox,
-                    cropped_image=det.cropped_path
+            # Gallery thumbnail, keyed by photo id
+            if thumbnail is not None and photo_id is not None:
+                self.detector.save_image_async(
+                    thumbnail, self.thumbs_dir / f"{photo_id}.webp",
+                    quality=THUMB_WEBP_QUALITY, save=_save_webp
                 )
             
             # Save annotated image if birds detected
@@ -379,20 +675,16 @@ class DetectionPipeline:
                 annotated_filename = f"annotated_{capture_result.filename}"
                 annotated_path = self.annotated_dir / annotated_filename
                 
-                img_pil = Image.fromarray(
-                    cv2.cvtColor(detection_result.annotated_image, cv2.COLOR_BGR2RGB)
+                self.detector.save_image_async(
+                    detection_result.annotated_image, annotated_path, quality=ANNOTATED_JPEG_QUALITY
                 )
-                img_pil.save(str(annotated_path), "JPEG", quality=85)
             
-            # Update hourly stats
-            now = datetime.now()
-            self.database.update_hourly_stats(
-                date=now.strftime("%Y-%m-%d"),
-                hour=now.hour,
-                total_photos=1,
-                photos_with_birds=1 if has_birds else 0,
-                total_birds=bird_count
-            )
+            # Accumulate hourly stats (flushed by _maybe_flush_stats)
+            with self._hour_lock:
+                counts = self._hour_buffer.setdefault((now.strftime("%Y-%m-%d"), now.hour), [0, 0, 0])
+                counts[0] += 1
+                counts[1] += 1 if has_birds else 0
+                counts[2] += bird_count
             
             # Update internal stats
             self.total_processed += 1
@@ -412,14 +704,29 @@ class DetectionPipeline:
             logger.error(f"Pipeline processing error: {e}")
             return DetectionResult(success=False, error=str(e))
     
-    def process_batch(self, capture_results: List) -> List[DetectionResult]:
-        """Process multiple capture results."""
-        results = []
-        for capture in capture_results:
-            result = self.process_capture(capture)
-            if result:
-                results.append(result)
-        return results
+    def _maybe_flush_stats(self, now: datetime):
+        """Flush buffered hourly stats on hour rollover or every stats_flush_seconds."""
+        with self._hour_lock:
+            if not self._hour_buffer:
+                return
+            rolled_over = any(hour != now.hour for _, hour in self._hour_buffer)
+        
+        if rolled_over or time.monotonic() - self._last_stats_flush >= self.stats_flush_seconds:
+            self.flush_stats()
+    
+    def flush_stats(self):
+        """Write buffered hourly stats to the database."""
+        with self._hour_lock:
+            buffered, self._hour_buffer = self._hour_buffer, {}
+            self._last_stats_flush = time.monotonic()
+        
+        try:
+            self.database.update_hourly_stats_batch([
+                (date, hour, total, with_birds, birds, None)
+                for (date, hour), (total, with_birds, birds) in buffered.items()
+            ])
+        except Exception as e:
+            logger.error(f"Failed to flush hourly stats: {e}")
     
     def get_stats(self) -> Dict:
         """Get pipeline statistics."""
@@ -8,24 +8,91 @@ import os
 import sys
 import signal
 import logging
+import logging.handlers
 import argparse
+from concurrent.futures import ThreadPoolExecutor
+from graphlib import TopologicalSorter
 from pathlib import Path
 from typing import Optional
 import threading
 import time
+from queue import Queue, Full
 
 import yaml
 
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    # Pure-Python fallback parses far slower (PyYAML built without libyaml)
+    from yaml import SafeLoader as YamlLoader
+    print("Warning: libyaml not available, config parsing will be slow")
+
 # Add src to path
 sys.path.insert(0, str(Path(__file__).parent))
 
 from database import get_database
 from camera import CameraManager
-from detector import BirdDetector, DetectionPipeline
 from recorder import VideoRecorder, create_bird_detection_handler
 from battery import SystemMonitor
 from notifications import NotificationManager, BirdNotification
-from web.app import create_app, run_server
+# detector (ultralytics/torch) and web.app (Flask/SocketIO) take seconds to
+# import, so they are loaded by the components that use them
+
+
+# Owns the real log handlers; hot threads only enqueue records
+_log_listener: Optional[logging.handlers.QueueListener] = None
+
+# Log file writes are coalesced: records are batched in memory, then
+# written through a large file buffer in one go
+LOG_BATCH_RECORDS = 64
+LOG_BUFFER_BYTES = 64 * 1024
+# Longest a quiet batch waits in memory before it reaches the file
+LOG_FLUSH_SECONDS = 1.0
+
+
+class BufferedRotatingFileHandler(logging.handlers.RotatingFileHandler):
+    """
+    RotatingFileHandler writing through a large buffer. The per-record flush
+    is skipped; BatchingMemoryHandler flushes once per batch instead.
+    """
+    
+    def _open(self):
+        return open(self.baseFilename, self.mode, buffering=LOG_BUFFER_BYTES,
+                    encoding=self.encoding, errors=self.errors)
+    
+    def flush(self):
+        pass
+    
+    def flush_buffer(self):
+        """Write buffered records to the file."""
+        super().flush()
+
+
+class BatchingMemoryHandler(logging.handlers.MemoryHandler):
+    """
+    MemoryHandler that flushes its buffered target after each batch, and
+    every LOG_FLUSH_SECONDS so `tail -f` (or a crash) never lags far behind.
+    """
+    
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._stop_flushing = threading.Event()
+        threading.Thread(target=self._flush_periodically, daemon=True, name="log-flush").start()
+    
+    def _flush_periodically(self):
+        while not self._stop_flushing.wait(LOG_FLUSH_SECONDS):
+            if self.buffer:
+                self.flush()
+    
+    def close(self):
+        self._stop_flushing.set()
+        super().close()
+    
+    def flush(self):
+        super().flush()
+        with self.lock:
+            if isinstance(self.target, BufferedRotatingFileHandler):
+                self.target.flush_buffer()
 
 
 # Configure logging
@@ -38,30 +105,48 @@ def setup_logging(config: dict):
     # Create logs directory with proper permissions
     log_dir = Path(log_file).parent
     try:
-        log_dir.mkdir(parents=True, exist_ok=True)
-        # Try to set permissions (may fail if not root)
-        os.chmod(str(log_dir), 0o755)
+        log_dir.mkdir(mode=0o755, parents=True, exist_ok=True)
     except PermissionError:
-        print(f"Warning: Could not set permissions on {log_dir}")
+        print(f"Warning: Could not create log directory {log_dir}")
+    
+    formatter = logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
     
     # Set up handlers
-    handlers = [logging.StreamHandler()]
+    console_handler = logging.StreamHandler()
+    console_handler.setFormatter(formatter)
+    handlers = [console_handler]
     
-    # Try to add file handler
+    # Try to add file handler (rotated by size; batched, flushed at once on warnings)
     try:
-        file_handler = logging.FileHandler(log_file)
-        handlers.append(file_handler)
+        file_handler = BufferedRotatingFileHandler(
+            log_file,
+            maxBytes=int(log_config.get("max_size_mb", 10) * 1024 * 1024),
+            backupCount=log_config.get("backup_count", 5)
+        )
+        file_handler.setFormatter(formatter)
+        handlers.append(BatchingMemoryHandler(
+            capacity=LOG_BATCH_RECORDS,
+            flushLevel=logging.WARNING,
+            target=file_handler
+        ))
     except PermissionError:
         print(f"Warning: Cannot write to log file {log_file}, using console only")
     except Exception as e:
         print(f"Warning: Error setting up log file: {e}")
     
+    # Handlers run on a listener thread, so logging never blocks on disk writes
+    
+    global _log_listener
+    log_queue = Queue(-1)
+    _log_listener = logging.handlers.QueueListener(log_queue, *handlers, respect_handler_level=True)
+    _log_listener.start()
+    
+    # The queue handler only merges args into the message; formatting happens on the listener
+    queue_handler = logging.handlers.QueueHandler(log_queue)
+    queue_handler.setFormatter(logging.Formatter("%(message)s"))
+    
     # Configure logging
-    logging.basicConfig(
-        level=log_level,
-        format="%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-        handlers=handlers
-    )
+    logging.basicConfig(level=log_level, handlers=[queue_handler])
     
     # Reduce noise from other libraries
     logging.getLogger("urllib3").setLevel(logging.WARNING)
@@ -69,16 +154,82 @@ def setup_logging(config: dict):
     logging.getLogger("ultralytics").setLevel(logging.WARNING)
 
 
+def shutdown_logging():
+    """Flush queued log records and stop the listener thread."""
+    global _log_listener
+    if _log_listener is not None:
+        _log_listener.stop()
+        for handler in _log_listener.handlers:
+            target = getattr(handler, "target", None)
+            handler.close()
+            if target is not None:
+                target.close()
+        _log_listener = None
+
+
 def load_config(config_path: str = "config/config.yaml") -> dict:
     """Load configuration from YAML file."""
-    config_file = Path(config_path)
-    
-    if not config_file.exists():
+    try:
+        with open(config_path, "r") as f:
+            return yaml.load(f, Loader=YamlLoader) or {}
+    except FileNotFoundError:
         logging.warning(f"Config file not found: {config_path}, using defaults")
         return {}
+
+
+class EmitBatcher:
+    """
+    Coalesces photo and detection WebSocket events into one message,
+    flushed after a short window or once enough events are pending.
+    """
     
-    with open(config_file, "r") as f:
-        return yaml.safe_load(f) or {}
+    def __init__(self, web_app, interval: float = 0.05, max_events: int = 32):
+        self.web_app = web_app
+        self.interval = interval
+        self.max_events = max_events
+        
+        self._photos = []
+        self._detections = []
+        self._lock = threading.Lock()
+        self._timer: Optional[threading.Timer] = None
+    
+    def add_photo(self, photo_data: dict):
+        """Queue a new-photo event."""
+        self._add(self._photos, photo_data)
+    
+    def add_detection(self, detection_data: dict):
+        """Queue a bird-detected event."""
+        self._add(self._detections, detection_data)
+    
+    def _add(self, events: list, data: dict):
+        with self._lock:
+            events.append(data)
+            if len(self._photos) + len(self._detections) >= self.max_events:
+                flush_now = True
+            else:
+                flush_now = False
+                if self._timer is None:
+                    self._timer = threading.Timer(self.interval, self.flush)
+                    self._timer.daemon = True
+                    self._timer.start()
+        
+        if flush_now:
+            self.flush()
+    
+    def flush(self):
+        """Emit all pending events."""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            photos, self._photos = self._photos, []
+            detections, self._detections = self._detections, []
+        
+        if photos or detections:
+            try:
+                self.web_app.emit_batch({"photos": photos, "detections": detections})
+            except Exception as e:
+                logging.getLogger(__name__).error(f"WebSocket emit error: {e}")
 
 
 class Pirdfy:
@@ -101,10 +252,21 @@ class Pirdfy:
         self.notification_manager = None
         self.web_app = None
         self.socketio = None
+        self._emit_batcher: Optional[EmitBatcher] = None
         
         self._running = False
         self._shutdown_event = threading.Event()
         self._cleanup_thread = None
+        
+        # stop() may be called from the signal watcher and the main thread at once
+        self._stop_lock = threading.Lock()
+        self._stopped = False
+        
+        # Captures are handed from the camera thread to a detection worker
+        queue_size = self.config.get("detection", {}).get("queue_size", 8)
+        self._capture_queue: Queue = Queue(maxsize=queue_size)
+        self._capture_worker = None
+        self._dropped_captures = 0
     
     def _setup_directories(self):
         """Create required data directories."""
@@ -127,74 +289,35 @@ class Pirdfy:
         """Initialize all components."""
         self.logger.info("Initializing Pirdfy...")
         
+        # Component -> (initializer, components it needs). Components whose
+        # dependencies are ready are initialized concurrently, so the camera
+        # opens while the detection model loads.
+        components = {
+            "database": (self._init_database, ()),
+            "camera": (self._init_camera, ()),
+            "detector": (self._init_detector, ()),
+            "notifications": (self._init_notifications, ()),
+            "pipeline": (self._init_pipeline, ("detector", "database")),
+            "recorder": (self._init_recorder, ("camera", "database")),
+            "monitor": (self._init_monitor, ("database",)),
+            "web": (self._init_web, (
+                "camera", "detector", "pipeline", "recorder",
+                "monitor", "notifications", "database"
+            )),
+        }
+        
         try:
-            # Database
-            data_path = self.config.get("storage", {}).get("data_path", "data")
-            self.database = get_database(f"{data_path}/pirdfy.db")
-            self.logger.info("Database initialized")
-            
-            # Camera Manager - continue even if no cameras found
-            self.camera_manager = CameraManager(self.config)
-            if not self.camera_manager.initialize():
-                self.logger.warning("No cameras initialized - running in web-only mode")
-                self.logger.warning("Camera features will be unavailable")
-            else:
-                self.logger.info(f"Camera manager initialized with {len(self.camera_manager.cameras)} camera(s)")
-            
-            # Bird Detector - continue even if detector fails
-            self.detector = BirdDetector(
-                self.config,
-                birds_dir=f"{data_path}/birds"
-            )
-            if not self.detector.initialize():
-                self.logger.warning("Bird detector not initialized - detection disabled")
-            else:
-                self.logger.info("Bird detector initialized")
-            
-            # Detection Pipeline
-            self.pipeline = DetectionPipeline(
-                self.detector,
-                self.database,
-                annotated_dir=f"{data_path}/annotated"
-            )
-            self.logger.info("Detection pipeline initialized")
-            
-            # Video Recorder
-            self.video_recorder = VideoRecorder(
-                self.config,
-                self.camera_manager,
-                self.database,
-                videos_dir=f"{data_path}/videos"
-            )
-            self.logger.info("Video recorder initialized")
-            
-            # System Monitor
-            self.system_monitor = SystemMonitor(
-                self.config,
-                self.database,
-                data_path=data_path
-            )
-            self.logger.info("System monitor initialized")
-            
-            # Notification Manager
-            self.notification_manager = NotificationManager(self.config)
-            if self.notification_manager.initialize():
-                self.logger.info("Notification manager initialized")
-            else:
-                self.logger.info("Notifications disabled or not configured")
-            
-            # Web Application
-            self.web_app, self.socketio = create_app(
-                self.config,
-                camera_manager=self.camera_manager,
-                detector=self.detector,
-                pipeline=self.pipeline,
-                video_recorder=self.video_recorder,
-                system_monitor=self.system_monitor,
-                notification_manager=self.notification_manager,
-                database=self.database
-            )
-            self.logger.info("Web application initialized")
+            sorter = TopologicalSorter({
+                name: deps for name, (_, deps) in components.items()
+            })
+            sorter.prepare()
+            with ThreadPoolExecutor(max_workers=len(components),
+                                    thread_name_prefix="pirdfy-init") as executor:
+                while sorter.is_active():
+                    ready = sorter.get_ready()
+                    # list() re-raises the first initializer failure
+                    list(executor.map(lambda name: components[name][0](), ready))
+                    sorter.done(*ready)
             
             # Wire up components
             self._connect_components()
@@ -206,40 +329,123 @@ class Pirdfy:
             self.logger.exception(f"Initialization failed: {e}")
             return False
     
+    def _init_database(self):
+        data_path = self.config.get("storage", {}).get("data_path", "data")
+        self.database = get_database(f"{data_path}/pirdfy.db")
+        self.logger.info("Database initialized")
+    
+    def _init_camera(self):
+        # Continue even if no cameras found
+        self.camera_manager = CameraManager(self.config)
+        if not self.camera_manager.initialize():
+            self.logger.warning("No cameras initialized - running in web-only mode")
+            self.logger.warning("Camera features will be unavailable")
+        else:
+            self.logger.info(f"Camera manager initialized with {len(self.camera_manager.cameras)} camera(s)")
+    
+    def _init_detector(self):
+        from detector import BirdDetector
+        
+        # Continue even if detector fails
+        data_path = self.config.get("storage", {}).get("data_path", "data")
+        self.detector = BirdDetector(
+            self.config,
+            birds_dir=f"{data_path}/birds"
+        )
+        if not self.detector.initialize():
+            self.logger.warning("Bird detector not initialized - detection disabled")
+        else:
+            self.logger.info("Bird detector initialized")
+    
+    def _init_pipeline(self):
+        from detector import DetectionPipeline
+        
+        data_path = self.config.get("storage", {}).get("data_path", "data")
+        self.pipeline = DetectionPipeline(
+            self.detector,
+            self.database,
+            annotated_dir=f"{data_path}/annotated",
+            thumbs_dir=f"{data_path}/thumbs"
+        )
+        self.logger.info("Detection pipeline initialized")
+    
+    def _init_recorder(self):
+        data_path = self.config.get("storage", {}).get("data_path", "data")
+        self.video_recorder = VideoRecorder(
+            self.config,
+            self.camera_manager,
+            self.database,
+            videos_dir=f"{data_path}/videos"
+        )
+        self.logger.info("Video recorder initialized")
+    
+    def _init_monitor(self):
+        data_path = self.config.get("storage", {}).get("data_path", "data")
+        self.system_monitor = SystemMonitor(
+            self.config,
+            self.database,
+            data_path=data_path
+        )
+        self.logger.info("System monitor initialized")
+    
+    def _init_notifications(self):
+        self.notification_manager = NotificationManager(self.config)
+        if self.notification_manager.initialize():
+            self.logger.info("Notification manager initialized")
+        else:
+            self.logger.info("Notifications disabled or not configured")
+    
+    def _init_web(self):
+        from web.app import create_app
+        
+        self.web_app, self.socketio = create_app(
+            self.config,
+            camera_manager=self.camera_manager,
+            detector=self.detector,
+            pipeline=self.pipeline,
+            video_recorder=self.video_recorder,
+            system_monitor=self.system_monitor,
+            notification_manager=self.notification_manager,
+            database=self.database
+        )
+        self._emit_batcher = EmitBatcher(self.web_app)
+        self.logger.info("Web application initialized")
+    
     def _connect_components(self):
         """Connect components via callbacks."""
         
         # Only connect camera callbacks if we have cameras
         if self.camera_manager and self.camera_manager.cameras:
-            # Camera capture -> Detection pipeline
+            # Camera capture -> Detection worker (never blocks the camera thread)
             def on_capture(capture_results):
-                for result in capture_results:
-                    if self.pipeline:
-                        detection_result = self.pipeline.process_capture(result)
-                    else:
-                        detection_result = None
-                    
-                    # Emit WebSocket events
-                    if self.web_app and result.success:
-                        self.web_app.emit_new_photo({
-                            "id": result.filepath,
-                            "filename": result.filename,
-                            "camera_id": result.camera_id,
-                            "timestamp": result.timestamp.isoformat() if result.timestamp else None
-                        })
-                        
-                        if detection_result and detection_result.detections:
-                            for det in detection_result.detections:
-                                # Convert numpy types to native Python for JSON
-                                bbox = tuple(int(x) for x in det.bbox)
-                                self.web_app.emit_bird_detected({
-                                    "confidence": float(det.confidence),
-                                    "bbox": bbox,
-                                    "cropped_image": det.cropped_path
-                                })
+                try:
+                    self._capture_queue.put_nowait(capture_results)
+                except Full:
+                    # Record the frames as bird-less photos without detection, so
+                    # cleanup (which finds files through the database) removes them
+                    for result in capture_results:
+                        if result.success and result.filepath:
+                            self.database.add_photo(
+                                result.filename, result.filepath, result.camera_id,
+                                metadata=result.metadata, wait=False
+                            )
+                    self._dropped_captures += 1
+                    self.logger.warning(
+                        f"Detection is falling behind, dropped capture "
+                        f"({self._dropped_captures} dropped so far)"
+                    )
             
             self.camera_manager.add_capture_callback(on_capture)
             
+            # Camera writes -> disk usage estimate between statvfs refreshes
+            if self.system_monitor:
+                def on_capture_written(capture_results):
+                    self.system_monitor.note_bytes_written(sum(
+                        result.metadata.get("jpeg_size", 0) for result in capture_results
+                    ))
+                
+                self.camera_manager.add_capture_callback(on_capture_written)
+            
             # Bird detection -> Video recording
             if self.pipeline and self.video_recorder:
                 bird_handler = create_bird_detection_handler(self.video_recorder)
@@ -290,13 +496,52 @@ class Pirdfy:
         
         self.system_monitor.add_low_battery_callback(on_low_battery)
     
+    def _process_captures(self, capture_results):
+        """Run detection on a capture batch and emit WebSocket events."""
+        if self.pipeline:
+            detection_results = self.pipeline.process_batch(capture_results)
+        else:
+            detection_results = [None] * len(capture_results)
+        
+        for result, detection_result in zip(capture_results, detection_results):
+            # Queue WebSocket events (sent in batches)
+            if self.web_app and result.success:
+                self._emit_batcher.add_photo({
+                    "id": result.filepath,
+                    "filename": result.filename,
+                    "camera_id": result.camera_id,
+                    "timestamp": result.timestamp.isoformat() if result.timestamp else None
+                })
+                
+                if detection_result and detection_result.detections:
+                    # Detection fields are already native Python (the detector
+                    # converts boxes with one vectorized .tolist() per frame)
+                    for det in detection_result.detections:
+                        self._emit_batcher.add_detection({
+                            "confidence": det.confidence,
+                            "bbox": det.bbox,
+                            "cropped_image": det.cropped_path
+                        })
+    
+    def _capture_worker_loop(self):
+        """Background thread that drains the capture queue."""
+        while True:
+            capture_results = self._capture_queue.get()
+            if capture_results is None:
+                break
+            try:
+                self._process_captures(capture_results)
+            except Exception as e:
+                self.logger.error(f"Capture processing error: {e}")
+    
     def _cleanup_empty_photos(self):
         """Delete photos without birds to save disk space."""
         data_path = Path(self.config.get("storage", {}).get("data_path", "data"))
         photos_path = data_path / "photos"
+        thumbs_path = data_path / "thumbs"
         
         try:
-            # Get photos without birds from database
+            # Fetch up front so no read connection is held during the file I/O
             photos_to_delete = self.database.get_recent_photos(limit=10000, with_birds_only=False)
             
             deleted_count = 0
@@ -310,6 +555,8 @@ class Pirdfy:
                     try:
                         filepath.unlink()
                         deleted_count += 1
+                        # Gallery thumbnail, if one was generated
+                        (thumbs_path / f"{photo['id']}.webp").unlink(missing_ok=True)
                     except Exception as e:
                         self.logger.warning(f"Failed to delete {filepath}: {e}")
             
@@ -335,6 +582,17 @@ class Pirdfy:
         
         self.logger.info("Cleanup thread stopped")
     
+    def _pin_thread(self, role: str, native_id: int):
+        """Restrict a thread to the CPU cores configured for its role (Linux only)."""
+        cores = self.config.get("system", {}).get("cpu_affinity", {}).get(role)
+        if not cores or not hasattr(os, "sched_setaffinity"):
+            return
+        try:
+            os.sched_setaffinity(native_id, set(cores))
+            self.logger.info(f"Pinned {role} thread to CPU core(s) {sorted(set(cores))}")
+        except OSError as e:
+            self.logger.warning(f"Could not pin {role} thread to {cores}: {e}")
+    
     def start(self):
         """Start all services."""
         self.logger.info("Starting Pirdfy services...")
@@ -351,7 +609,13 @@ class Pirdfy:
             
             # Start camera capture (only if we have cameras)
             if self.camera_manager and self.camera_manager.cameras:
+                self._capture_worker = threading.Thread(
+                    target=self._capture_worker_loop, daemon=True, name="capture-worker"
+                )
+                self._capture_worker.start()
+                self._pin_thread("detection", self._capture_worker.native_id)
                 self.camera_manager.start_continuous_capture()
+                self._pin_thread("capture", self.camera_manager.capture_native_id)
                 self.logger.info("Camera capture started")
             else:
                 self.logger.warning("No cameras available - capture disabled")
@@ -368,6 +632,9 @@ class Pirdfy:
             self.logger.info(f"Starting web server on {host}:{port}")
             self.logger.info(f"Dashboard available at http://{host}:{port}")
             
+            # The server runs on this thread; its worker threads inherit the pinning
+            self._pin_thread("web", threading.get_native_id())
+            from web.app import run_server
             run_server(self.web_app, self.socketio, host=host, port=port)
             
         except KeyboardInterrupt:
@@ -375,13 +642,25 @@ class Pirdfy:
         finally:
             self.stop()
     
+    @property
+    def running(self) -> bool:
+        """Whether start() has been called and stop() has not."""
+        return self._running
+    
     def stop(self):
-        """Stop all services."""
-        if not self._running:
-            return
-        
+        """
+        Stop all services and close every component that was initialized.
+        Runs once; concurrent callers wait for the first to finish.
+        """
+        with self._stop_lock:
+            if self._stopped:
+                return
+            self._stopped = True
+            self._running = False
+            self._stop_components()
+    
+    def _stop_components(self):
         self.logger.info("Stopping Pirdfy services...")
-        self._running = False
         
         # Signal cleanup thread to stop
         self._shutdown_event.set()
@@ -394,9 +673,20 @@ class Pirdfy:
             self.camera_manager.stop_continuous_capture()
             self.camera_manager.close()
         
+        # Finish captures already queued, then stop the worker
+        if self._capture_worker and self._capture_worker.is_alive():
+            self._capture_queue.put(None)
+            self._capture_worker.join(timeout=30)
+        
+        if self._emit_batcher:
+            self._emit_batcher.flush()
+        
         if self.video_recorder:
             self.video_recorder.stop()
         
+        if self.pipeline:
+            self.pipeline.flush_stats()
+        
         if self.system_monitor:
             self.system_monitor.stop()
         
@@ -406,7 +696,61 @@ class Pirdfy:
         if self.notification_manager:
             self.notification_manager.close()
         
+        # Last, so buffered stats flushed above are committed
+        if self.database:
+            self.database.close()
+        
         self.logger.info("Pirdfy stopped")
+        shutdown_logging()
+
+
+def install_signal_handlers(app: "Pirdfy"):
+    """
+    Stop the app on SIGINT/SIGTERM from a watcher thread rather than inside
+    the signal handler, where cleanup could interrupt code holding locks.
+    """
+    # The C-level handler writes each signal to this pipe, so the watcher
+    # wakes even while the main thread is blocked in the web server
+    read_fd, write_fd = os.pipe()
+    os.set_blocking(write_fd, False)
+    signal.set_wakeup_fd(write_fd)
+    logger = logging.getLogger(__name__)
+    unwind = threading.Event()
+    # Counts the SIGINTs sent to the main thread below, so the watcher can
+    # tell them apart from a second signal from the user
+    own_signals = threading.Semaphore(0)
+    
+    def signal_handler(sig, frame):
+        # Cleanup happens off this handler; once it's done, unwind the main thread (once)
+        if unwind.is_set():
+            unwind.clear()
+            raise KeyboardInterrupt
+    
+    def shut_down():
+        # Before start(), leave stopping to main(): the main thread is still
+        # initializing components and closes them all once it has unwound
+        if app.running:
+            app.stop()
+        unwind.set()
+        own_signals.release()
+        # A real signal, so blocking calls in the main thread return (EINTR)
+        signal.pthread_kill(threading.main_thread().ident, signal.SIGINT)
+    
+    def watch_signals():
+        os.read(read_fd, 1)
+        logger.info("Received shutdown signal (send another to exit immediately)")
+        threading.Thread(target=shut_down, daemon=True, name="shutdown").start()
+        while True:
+            os.read(read_fd, 1)
+            if own_signals.acquire(blocking=False):
+                continue
+            # Shutdown is stuck (or the user is impatient); don't wait on it
+            print("Second shutdown signal, exiting immediately", file=sys.stderr)
+            os._exit(1)
+    
+    signal.signal(signal.SIGINT, signal_handler)
+    signal.signal(signal.SIGTERM, signal_handler)
+    threading.Thread(target=watch_signals, daemon=True, name="signal-watcher").start()
 
 
 def main():
@@ -453,20 +797,20 @@ def main():
     # Create and run application
     app = Pirdfy(config)
     
-    # Handle signals
-    def signal_handler(sig, frame):
-        app.stop()
-        sys.exit(0)
-    
-    signal.signal(signal.SIGINT, signal_handler)
-    signal.signal(signal.SIGTERM, signal_handler)
+    install_signal_handlers(app)
     
     # Initialize and start
-    if app.initialize():
-        app.start()
-    else:
-        logging.error("Failed to initialize Pirdfy")
-        sys.exit(1)
+    try:
+        if app.initialize():
+            app.start()
+        else:
+            logging.error("Failed to initialize Pirdfy")
+            # Close whatever did initialize (this also stops logging)
+            app.stop()
+            sys.exit(1)
+    except KeyboardInterrupt:
+        # Signalled before the web server was running
+        app.stop()
 
 
 if __name__ == "__main__":
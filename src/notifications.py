@@ -5,20 +5,48 @@ Supports Pushover and many other services.
 """
 
 import logging
+import re
+import string
+import time
 from pathlib import Path
 from typing import Optional, List
 from dataclasses import dataclass
+from functools import lru_cache
 from datetime import datetime
 
-try:
-    import apprise
-    APPRISE_AVAILABLE = True
-except ImportError:
-    APPRISE_AVAILABLE = False
-    apprise = None
+# Imported by NotificationManager.initialize(), only when notifications are enabled
+apprise = None
 
 logger = logging.getLogger(__name__)
 
+_formatter = string.Formatter()
+
+# scheme://credentials@host... or scheme://host/tokens...
+_MASK_URL_RE = re.compile(r"(.*?)://(?:(.*)@(.*)|([^/]*)/.*)", re.DOTALL)
+
+
+def _compile_template(template: str):
+    """
+    Parse a str.format template once and return a function rendering it,
+    so notifications don't re-parse the template each time.
+    """
+    parts = list(_formatter.parse(template))
+    if any(spec and "{" in spec for _, _, spec, _ in parts):
+        # Nested replacement fields in a format spec; leave those to str.format
+        return template.format
+    
+    def render(**fields) -> str:
+        out = []
+        for literal, field_name, format_spec, conversion in parts:
+            out.append(literal)
+            if field_name is not None:
+                value, _ = _formatter.get_field(field_name, (), fields)
+                value = _formatter.convert_field(value, conversion)
+                out.append(format(value, format_spec))
+        return "".join(out)
+    
+    return render
+
 
 @dataclass
 class BirdNotification:
@@ -37,10 +65,12 @@ class NotificationManager:
         self.config = config.get("notifications", {})
         self.enabled = self.config.get("enabled", False)
         self.apprise = None
-        self._last_notification_time: Optional[datetime] = None
+        # Monotonic, so wall-clock adjustments (NTP sync on boot) can't skew the cooldown
+        self._last_notification_ns: Optional[int] = None
         
         # Cooldown between notifications (avoid spam)
         self.cooldown_seconds = self.config.get("cooldown_seconds", 60)
+        self._cooldown_ns = int(self.cooldown_seconds * 1_000_000_000)
         
         # Whether to attach bird images
         self.attach_images = self.config.get("attach_images", True)
@@ -51,6 +81,7 @@ class NotificationManager:
         # Notification body template
         self.body_template = self.config.get("body", 
             "A bird was detected at {time} (confidence: {confidence:.0%})")
+        self._render_body = _compile_template(self.body_template)
     
     def initialize(self) -> bool:
         """Initialize the notification system."""
@@ -58,7 +89,10 @@ class NotificationManager:
             logger.info("Notifications disabled in config")
             return True
         
-        if not APPRISE_AVAILABLE:
+        global apprise
+        try:
+            import apprise
+        except ImportError:
             logger.error("Apprise not installed. Run: pip install apprise")
             return False
         
@@ -72,14 +106,20 @@ class NotificationManager:
         try:
             self.apprise = apprise.Apprise()
             
+            # Parse every URL up front, then register the valid services in one call
+            services = []
             for url in urls:
-                if self.apprise.add(url):
-                    # Mask the URL for logging (hide tokens)
-                    masked = self._mask_url(url)
-                    logger.info(f"Added notification service: {masked}")
+                service = apprise.Apprise.instantiate(url)
+                # Mask the URL for logging (hide tokens)
+                if service:
+                    services.append(service)
+                    logger.info(f"Added notification service: {self._mask_url(url)}")
                 else:
                     logger.warning(f"Failed to add notification URL: {self._mask_url(url)}")
             
+            if services:
+                self.apprise.add(services)
+            
             if len(self.apprise) == 0:
                 logger.error("No valid notification services configured")
                 return False
@@ -91,29 +131,25 @@ class NotificationManager:
             logger.error(f"Failed to initialize notifications: {e}")
             return False
     
-    def _mask_url(self, url: str) -> str:
+    @staticmethod
+    @lru_cache(maxsize=32)
+    def _mask_url(url: str) -> str:
         """Mask sensitive parts of notification URLs for logging."""
-        # Simple masking - hide anything after :// up to @
-        if "://" in url:
-            prefix, rest = url.split("://", 1)
-            if "@" in rest:
-                credentials, host = rest.rsplit("@", 1)
-                # Mask credentials
-                return f"{prefix}://****@{host}"
-            else:
-                # Mask tokens in the path
-                parts = rest.split("/")
-                if len(parts) > 1:
-                    return f"{prefix}://{parts[0]}/****"
-        return url[:20] + "..."
+        # Hide credentials before the last @, otherwise tokens in the path
+        match = _MASK_URL_RE.match(url)
+        if match is None:
+            return url[:20] + "..."
+        scheme, _, host, first_segment = match.groups()
+        if host is not None:
+            return f"{scheme}://****@{host}"
+        return f"{scheme}://{first_segment}/****"
     
     def _can_send_notification(self) -> bool:
         """Check if we can send a notification (respecting cooldown)."""
-        if self._last_notification_time is None:
+        if self._last_notification_ns is None:
             return True
         
-        elapsed = (datetime.now() - self._last_notification_time).total_seconds()
-        return elapsed >= self.cooldown_seconds
+        return time.monotonic_ns() - self._last_notification_ns >= self._cooldown_ns
     
     def notify_bird_detected(self, notification: BirdNotification) -> bool:
         """Send a notification for a bird detection."""
@@ -127,7 +163,7 @@ class NotificationManager:
         try:
             # Format the message
             title = self.title_template
-            body = self.body_template.format(
+            body = self._render_body(
                 time=notification.timestamp.strftime("%H:%M:%S"),
                 confidence=notification.confidence,
                 camera=notification.camera_id,
@@ -155,7 +191,7 @@ class NotificationManager:
             )
             
             if result:
-                self._last_notification_time = datetime.now()
+                self._last_notification_ns = time.monotonic_ns()
                 logger.info(f"Bird notification sent successfully")
             else:
                 logger.warning("Failed to send bird notification")
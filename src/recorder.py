@@ -10,7 +10,7 @@ from pathlib import Path
 from datetime import datetime
 from typing import Optional, Dict, Any, Callable
 from dataclasses import dataclass
-from queue import Queue, Empty
+from queue import Queue
 import os
 
 logger = logging.getLogger(__name__)
@@ -33,6 +33,8 @@ class VideoRecorder:
     Records for a configurable duration with cooldown between recordings.
     """
     
+    _STOP = object()
+    
     def __init__(self, config: Dict[str, Any], camera_manager, database,
                  videos_dir: str = "data/videos"):
         self.config = config.get("video", {})
@@ -57,6 +59,7 @@ class VideoRecorder:
         # Recording queue and thread
         self._job_queue = Queue()
         self._running = False
+        self._stop_event = threading.Event()
         self._worker_thread = None
         
         # Callbacks
@@ -69,6 +72,7 @@ class VideoRecorder:
             return
         
         self._running = True
+        self._stop_event.clear()
         self._worker_thread = threading.Thread(target=self._worker_loop, daemon=True)
         self._worker_thread.start()
         logger.info("Video recorder started")
@@ -76,8 +80,11 @@ class VideoRecorder:
     def stop(self):
         """Stop the video recorder."""
         self._running = False
+        self._stop_event.set()
         if self._worker_thread:
+            self._job_queue.put(self._STOP)
             self._worker_thread.join(timeout=5)
+            self._worker_thread = None
         logger.info("Video recorder stopped")
     
     def trigger_recording(self, camera_id: int, trigger_photo_id: int) -> bool:
@@ -118,12 +125,15 @@ class VideoRecorder:
     
     def _worker_loop(self):
         """Worker thread that processes recording jobs."""
-        while self._running:
+        while True:
+            # Block until a job arrives; stop() wakes us with a sentinel
+            job = self._job_queue.get()
+            if job is self._STOP:
+                break
+            if self._stop_event.is_set():
+                continue
             try:
-                job = self._job_queue.get(timeout=1)
                 self._process_job(job)
-            except Empty:
-                continue
             except Exception as e:
                 logger.error(f"Recording worker error: {e}")
     
@@ -152,8 +162,10 @@ class VideoRecorder:
             
             # Start recording
             if camera.start_video_recording(job.output_path, job.duration):
-                # Wait for recording duration
-                time.sleep(job.duration)
+                # Wait for recording duration, returning early on stop()
+                if self._stop_event.wait(job.duration):
+                    job.duration = (datetime.now() - job.started_at).total_seconds()
+                    logger.info("Recording cut short by shutdown")
                 
                 # Stop recording
                 camera.stop_video_recording()
@@ -161,9 +173,10 @@ class VideoRecorder:
                 job.completed = True
                 
                 # Get file size
-                filesize = 0
-                if os.path.exists(job.output_path):
-                    filesize = os.path.getsize(job.output_path)
+                try:
+                    filesize = os.stat(job.output_path).st_size
+                except FileNotFoundError:
+                    filesize = 0
                 
                 # Save to database
                 self.database.add_video(
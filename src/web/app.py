@@ -4,17 +4,201 @@ Flask-based web server with REST API and WebSocket support.
 """
 
 import os
+import json
 import logging
-from pathlib import Path
+import threading
+import time
+from pathlib import Path, PurePath
 from datetime import datetime
+from decimal import Decimal
 from typing import Optional
 
-from flask import Flask, render_template, jsonify, request, send_from_directory, Response
+from flask import Flask, render_template, jsonify, request, send_from_directory, Response, abort
+from flask.json.provider import DefaultJSONProvider
 from flask_socketio import SocketIO, emit
-from flask_cors import CORS
+from PIL import Image
+from werkzeug.utils import safe_join
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+try:
+    from flask_compress import Compress
+    COMPRESS_AVAILABLE = True
+except ImportError:
+    COMPRESS_AVAILABLE = False
 
 logger = logging.getLogger(__name__)
 
+# CORS: any origin may call the API (what CORS(app) allowed); Flask answers
+# OPTIONS preflights itself, these headers just go on top
+CORS_HEADERS = {"Access-Control-Allow-Origin": "*"}
+CORS_PREFLIGHT_HEADERS = {
+    "Access-Control-Allow-Origin": "*",
+    "Access-Control-Allow-Methods": "GET, HEAD, POST, OPTIONS",
+    "Access-Control-Allow-Headers": "Content-Type",
+    "Access-Control-Max-Age": "86400",
+}
+
+
+def _flag(value: str) -> bool:
+    """Parse a ?name=true query flag."""
+    return value.lower() == "true"
+
+
+# Query parameters per route: (name, default, type); defaults are returned as-is
+PHOTOS_ARGS = (("limit", 50, int), ("birds_only", False, _flag), ("camera_id", None, int))
+BIRDS_ARGS = (("limit", 50, int),)
+VIDEOS_ARGS = (("limit", 20, int),)
+HOURLY_ARGS = (("days", 7, int),)
+SPECIES_ARGS = (("days", 30, int),)
+DAILY_ARGS = (("days", 7, int),)
+
+
+def _query_args(spec) -> tuple:
+    """Read a route's query parameters in one pass over its spec."""
+    args = request.args
+    return tuple(args.get(name, default, type=type_) for name, default, type_ in spec)
+
+
+# Gallery thumbnails: bounding box and WebP quality (the pipeline writes
+# them at capture time with the same settings; these are for the fallback)
+THUMB_SIZE = (320, 320)
+THUMB_QUALITY = 75
+
+# Stats change at most once per capture; the dashboard polls every few seconds
+STATS_CACHE_TTL = 5.0
+STATUS_CACHE_TTL = 1.0
+# Cache entries that only change when a bird is detected
+DETECTION_STATS_KEYS = ("hourly", "species", "daily")
+
+# Captured media is written once under a unique timestamped name, so
+# browsers can cache it for good without revalidating. Annotated frames
+# could be redrawn, and videos are written in place while recording (a
+# request can see a partial file), so those are revalidated (cheaply, by
+# ETag) after a day.
+MEDIA_MAX_AGE = 31536000
+REVALIDATED_MEDIA_MAX_AGE = 86400
+
+
+def _json_default(obj):
+    """Fallback serializer for types neither encoder handles natively."""
+    if hasattr(obj, "isoformat"):
+        return obj.isoformat()
+    if isinstance(obj, (Decimal, PurePath)):
+        return str(obj)
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def _dumps(payload) -> bytes:
+    """Serialize a payload to JSON bytes, with datetimes as ISO 8601."""
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(
+            payload,
+            default=_json_default,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        )
+    return json.dumps(payload, default=_json_default).encode()
+
+
+def _stream_json_list(key: str, rows):
+    """
+    Yield {"success": true, key: [...], "count": n} piece by piece, encoding
+    one row at a time so the full JSON body is never held in memory whole.
+    """
+    yield b'{"success":true,' + _dumps(key) + b':['
+    for i, row in enumerate(rows):
+        if i:
+            yield b","
+        yield _dumps(row)
+    yield b'],"count":' + str(len(rows)).encode() + b"}"
+
+
+def _make_thumbnail(source: str, thumb: str):
+    """Write a WebP thumbnail of an image, atomically so readers never see a partial file."""
+    tmp = f"{thumb}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with Image.open(source) as image:
+        # Let the JPEG decoder downscale by up to 8x instead of decoding full size
+        image.draft("RGB", THUMB_SIZE)
+        image.thumbnail(THUMB_SIZE)
+        image.save(tmp, "WEBP", quality=THUMB_QUALITY, method=4)
+    os.replace(tmp, thumb)
+
+
+class ResponseCache:
+    """
+    Serialized JSON bodies keyed by endpoint and arguments, each kept for a
+    short TTL so repeated polls skip both the SQL and the encoding.
+    """
+    
+    def __init__(self, maxsize: int = 64):
+        self.maxsize = maxsize
+        self._entries = {}  # key -> (expires_at, body)
+        self._lock = threading.Lock()
+    
+    def get_or_build(self, key, ttl: float, build) -> bytes:
+        """Return the cached body for key, calling build() if missing or expired."""
+        now = time.monotonic()
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is not None and entry[0] > now:
+            return entry[1]
+        
+        body = _dumps(build())
+        with self._lock:
+            if len(self._entries) >= self.maxsize:
+                # Keys are a handful of endpoint/argument pairs; just start over
+                self._entries.clear()
+            self._entries[key] = (now + ttl, body)
+        return body
+    
+    def clear(self):
+        """Drop all cached bodies (new data arrived)."""
+        with self._lock:
+            self._entries.clear()
+    
+    def discard(self, names):
+        """Drop cached bodies for the given endpoint names, whatever their arguments."""
+        with self._lock:
+            for key in [key for key in self._entries if key[0] in names]:
+                del self._entries[key]
+
+
+class OrjsonSocketJSON:
+    """json-module stand-in so Socket.IO packets are encoded with orjson too."""
+    
+    @staticmethod
+    def dumps(obj, **kwargs) -> str:
+        return _dumps(obj).decode()
+    
+    @staticmethod
+    def loads(s, **kwargs):
+        return orjson.loads(s)
+
+
+class AppJSONProvider(DefaultJSONProvider):
+    """
+    JSON provider backing jsonify() with _dumps, so every API route shares one
+    serializer (orjson when installed) and its datetime/numpy handling.
+    Output is always compact and unsorted, debug mode included.
+    """
+    
+    def dumps(self, obj, **kwargs) -> str:
+        return _dumps(obj).decode()
+    
+    def loads(self, s, **kwargs):
+        if ORJSON_AVAILABLE:
+            return orjson.loads(s)
+        return json.loads(s)
+    
+    def response(self, *args, **kwargs) -> Response:
+        # Hand the encoded bytes straight to the response, skipping a str round trip
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(_dumps(obj), mimetype=self.mimetype)
+
 
 def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
                video_recorder=None, system_monitor=None, notification_manager=None,
@@ -32,17 +216,47 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
         template_folder=str(template_dir),
         static_folder=str(static_dir)
     )
+    # "/api/photos/" matches "/api/photos" directly rather than via a 308 redirect
+    app.url_map.strict_slashes = False
+    app.json = AppJSONProvider(app)
     
     # Configuration
     web_config = config.get("web", {})
     app.config["SECRET_KEY"] = os.environ.get("SECRET_KEY", "pirdfy-secret-key-change-me")
     app.config["DEBUG"] = web_config.get("debug", False)
+    # Let a fronting web server send media files itself (see config.yaml)
+    app.config["USE_X_SENDFILE"] = web_config.get("x_sendfile", False)
+    
+    # Compress JSON only; media is already compressed (and may be sent via X-Sendfile).
+    # Streamed lists are left alone, since compressing them would buffer the whole body.
+    if COMPRESS_AVAILABLE:
+        app.config["COMPRESS_MIMETYPES"] = ["application/json"]
+        app.config["COMPRESS_ALGORITHM"] = ["br", "gzip"]
+        app.config["COMPRESS_LEVEL"] = 4
+        app.config["COMPRESS_BR_LEVEL"] = 4
+        app.config["COMPRESS_MIN_SIZE"] = 1024
+        app.config["COMPRESS_STREAMS"] = False
+        Compress(app)
     
     # Enable CORS
-    CORS(app)
+    @app.after_request
+    def add_cors_headers(response):
+        if request.method == "OPTIONS":
+            response.headers.update(CORS_PREFLIGHT_HEADERS)
+        else:
+            response.headers.update(CORS_HEADERS)
+        return response
     
     # Initialize SocketIO
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode="eventlet")
+    # Server backend: eventlet (default), gevent (C event loop and HTTP parser;
+    # needs gevent and gevent-websocket installed) or threading
+    async_mode = web_config.get("async_mode", "eventlet")
+    socketio = SocketIO(
+        app,
+        cors_allowed_origins="*",
+        async_mode=async_mode,
+        json=OrjsonSocketJSON if ORJSON_AVAILABLE else None
+    )
     
     # Store references
     app.camera_manager = camera_manager
@@ -60,11 +274,36 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     birds_path = data_path / "birds"
     videos_path = data_path / "videos"
     annotated_path = data_path / "annotated"
+    thumbs_path = data_path / "thumbs"
     
     # Ensure directories exist
-    for p in [photos_path, birds_path, videos_path, annotated_path]:
+    for p in [photos_path, birds_path, videos_path, annotated_path, thumbs_path]:
         p.mkdir(parents=True, exist_ok=True)
     
+    # Converted once; the file routes below serve from these
+    photos_dir = str(photos_path)
+    birds_dir = str(birds_path)
+    videos_dir = str(videos_path)
+    annotated_dir = str(annotated_path)
+    thumbs_dir = str(thumbs_path)
+    
+    def send_media(directory: str, filename: str, immutable: bool = True) -> Response:
+        """Serve a media file with Last-Modified/ETag and long-lived caching."""
+        response = send_from_directory(
+            directory, filename,
+            max_age=MEDIA_MAX_AGE if immutable else REVALIDATED_MEDIA_MAX_AGE
+        )
+        response.cache_control.immutable = immutable
+        return response
+    
+    # Stats and status bodies, cleared whenever new captures are announced
+    response_cache = ResponseCache()
+    
+    def cached_json(key, ttl: float, build_payload) -> Response:
+        """JSON response served from response_cache, built on a miss."""
+        body = response_cache.get_or_build(key, ttl, build_payload)
+        return Response(body, mimetype="application/json")
+    
     # ================== Page Routes ==================
     
     @app.route("/")
@@ -93,21 +332,16 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     @app.route("/api/photos")
     def api_get_photos():
         """Get recent photos."""
-        limit = request.args.get("limit", 50, type=int)
-        birds_only = request.args.get("birds_only", "false").lower() == "true"
-        camera_id = request.args.get("camera_id", None, type=int)
+        limit, birds_only, camera_id = _query_args(PHOTOS_ARGS)
         
+        # Rows are fetched up front so the pooled connection is returned before
+        # the (possibly slow) client reads the body; only encoding is streamed
         photos = database.get_recent_photos(
             limit=limit,
             with_birds_only=birds_only,
             camera_id=camera_id
         )
-        
-        return jsonify({
-            "success": True,
-            "photos": photos,
-            "count": len(photos)
-        })
+        return Response(_stream_json_list("photos", photos), mimetype="application/json")
     
     @app.route("/api/photos/<int:photo_id>")
     def api_get_photo(photo_id: int):
@@ -125,35 +359,62 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     @app.route("/api/photos/image/<path:filename>")
     def api_get_photo_image(filename: str):
         """Serve a photo image."""
-        return send_from_directory(str(photos_path), filename)
+        return send_media(photos_dir, filename)
+    
+    def run_blocking(func, *args):
+        """Run CPU-bound work on an OS thread so the server's event loop keeps serving."""
+        if async_mode == "eventlet":
+            from eventlet import tpool
+            return tpool.execute(func, *args)
+        if async_mode == "gevent":
+            import gevent
+            return gevent.get_hub().threadpool.apply(func, args)
+        return func(*args)
+    
+    @app.route("/api/photos/thumb/<int:photo_id>")
+    def api_get_photo_thumb(photo_id: int):
+        """Serve a photo's WebP thumbnail (written by the detection pipeline)."""
+        thumb_name = f"{photo_id}.webp"
+        thumb = os.path.join(thumbs_dir, thumb_name)
+        if not os.path.exists(thumb):
+            # Photos recorded without the pipeline (or before thumbnails
+            # existed) get theirs made on first request
+            photo = database.get_photo(photo_id)
+            if photo is None:
+                abort(404)
+            source = safe_join(photos_dir, photo["filename"])
+            if source is None or not os.path.isfile(source):
+                abort(404)
+            try:
+                run_blocking(_make_thumbnail, source, thumb)
+            except OSError as e:
+                logger.warning(f"Could not create thumbnail for photo {photo_id}: {e}")
+                return send_media(photos_dir, photo["filename"])
+        return send_media(thumbs_dir, thumb_name)
     
     @app.route("/api/photos/annotated/<path:filename>")
     def api_get_annotated_image(filename: str):
         """Serve an annotated photo image."""
-        return send_from_directory(str(annotated_path), filename)
+        return send_media(annotated_dir, filename, immutable=False)
     
     # --- Birds ---
     @app.route("/api/birds")
     def api_get_birds():
         """Get recent bird detections."""
-        limit = request.args.get("limit", 50, type=int)
+        limit, = _query_args(BIRDS_ARGS)
         detections = database.get_recent_detections(limit=limit)
-        return jsonify({
-            "success": True,
-            "detections": detections,
-            "count": len(detections)
-        })
+        return Response(_stream_json_list("detections", detections), mimetype="application/json")
     
     @app.route("/api/birds/image/<path:filename>")
     def api_get_bird_image(filename: str):
         """Serve a cropped bird image."""
-        return send_from_directory(str(birds_path), filename)
+        return send_media(birds_dir, filename)
     
     # --- Videos ---
     @app.route("/api/videos")
     def api_get_videos():
         """Get recent videos."""
-        limit = request.args.get("limit", 20, type=int)
+        limit, = _query_args(VIDEOS_ARGS)
         videos = database.get_recent_videos(limit=limit)
         return jsonify({
             "success": True,
@@ -164,39 +425,36 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     @app.route("/api/videos/file/<path:filename>")
     def api_get_video_file(filename: str):
         """Serve a video file."""
-        return send_from_directory(str(videos_path), filename)
+        return send_media(videos_dir, filename, immutable=False)
     
     # --- Statistics ---
     @app.route("/api/stats/hourly")
     def api_get_hourly_stats():
         """Get hourly detection heatmap data."""
-        days = request.args.get("days", 7, type=int)
-        heatmap = database.get_hourly_heatmap(days=days)
-        return jsonify({
+        days, = _query_args(HOURLY_ARGS)
+        return cached_json(("hourly", days), STATS_CACHE_TTL, lambda: {
             "success": True,
-            "heatmap": heatmap,
+            "heatmap": database.get_hourly_heatmap(days=days),
             "days": days
         })
     
     @app.route("/api/stats/species")
     def api_get_species_stats():
         """Get species detection statistics."""
-        days = request.args.get("days", 30, type=int)
-        species = database.get_species_stats(days=days)
-        return jsonify({
+        days, = _query_args(SPECIES_ARGS)
+        return cached_json(("species", days), STATS_CACHE_TTL, lambda: {
             "success": True,
-            "species": species,
+            "species": database.get_species_stats(days=days),
             "days": days
         })
     
     @app.route("/api/stats/daily")
     def api_get_daily_stats():
         """Get daily summary statistics."""
-        days = request.args.get("days", 7, type=int)
-        summary = database.get_daily_summary(days=days)
-        return jsonify({
+        days, = _query_args(DAILY_ARGS)
+        return cached_json(("daily", days), STATS_CACHE_TTL, lambda: {
             "success": True,
-            "summary": summary,
+            "summary": database.get_daily_summary(days=days),
             "days": days
         })
     
@@ -214,7 +472,8 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     @app.route("/api/config", methods=["GET"])
     def api_get_config():
         """Get current configuration."""
-        return jsonify({
+        # Short TTL: camera info includes live recording state
+        return cached_json(("config",), STATUS_CACHE_TTL, lambda: {
             "success": True,
             "config": {
                 "camera": {
@@ -231,6 +490,7 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     def api_update_config():
         """Update configuration."""
         data = request.get_json()
+        response_cache.clear()
         
         try:
             # Update capture interval
@@ -270,6 +530,7 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     def api_update_camera_settings(camera_id: int):
         """Update camera settings."""
         data = request.get_json()
+        response_cache.clear()
         
         if camera_manager:
             success = camera_manager.update_camera_settings(camera_id, **data)
@@ -309,9 +570,9 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     @app.route("/api/status")
     def api_get_status():
         """Get system status."""
-        status_data = {
+        return cached_json(("status",), STATUS_CACHE_TTL, lambda: {
             "success": True,
-            "timestamp": datetime.now().isoformat(),
+            "timestamp": datetime.now(),
             "system": system_monitor.get_status_dict() if system_monitor else None,
             "uptime": system_monitor.get_uptime_formatted() if system_monitor else None,
             "cameras": {
@@ -320,8 +581,7 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
             },
             "video": video_recorder.get_status() if video_recorder else None,
             "pipeline": pipeline.get_stats() if pipeline else None
-        }
-        return jsonify(status_data)
+        })
     
     @app.route("/api/status/battery")
     def api_get_battery():
@@ -395,7 +655,8 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     def handle_subscribe(data):
         """Handle subscription to updates."""
         channel = data.get("channel", "all")
-        logger.info(f"Client subscribed to {channel}")
+        # Formatted only if INFO is enabled; reconnect storms hit this per client
+        logger.info("Client subscribed to %s", channel)
         emit("subscribed", {"channel": channel})
     
     # Function to emit events (called from other modules)
@@ -405,8 +666,16 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     
     def emit_bird_detected(detection_data):
         """Emit bird detection event to all clients."""
+        response_cache.discard(DETECTION_STATS_KEYS)
         socketio.emit("bird_detected", detection_data)
     
+    def emit_batch(batch_data):
+        """Emit coalesced photo and detection events as one message."""
+        # Photos alone don't move the stats; status catches up within its TTL
+        if batch_data.get("detections"):
+            response_cache.discard(DETECTION_STATS_KEYS)
+        socketio.emit("capture_batch", batch_data)
+    
     def emit_recording_started(recording_data):
         """Emit recording started event."""
         socketio.emit("recording_started", recording_data)
@@ -422,6 +691,7 @@ def create_app(config: dict, camera_manager=None, detector=None, pipeline=None,
     # Store emit functions on app for access from main.py
     app.emit_new_photo = emit_new_photo
     app.emit_bird_detected = emit_bird_detected
+    app.emit_batch = emit_batch
     app.emit_recording_started = emit_recording_started
     app.emit_recording_ended = emit_recording_ended
     app.emit_status_update = emit_status_update